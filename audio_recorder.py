@@ -5,35 +5,81 @@ Handles FFmpeg recording functionality
 """
 
 import os
+import json
+import re
+import shutil
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
 
+# Matches device lines like: "Microphone (USB PnP Sound Device)" (audio)
+DSHOW_AUDIO_DEVICE = re.compile(r'"([^"]+)"\s*\(audio\)')
+
+# Drops any stretch of silence longer than 2 s (below -40 dB) from the recording
+SILENCE_FILTER = 'silenceremove=stop_periods=-1:stop_duration=2:stop_threshold=-40dB'
+
+# How long the enumerated device list stays valid (seconds)
+DEVICE_CACHE_TTL = 24 * 60 * 60
+
 
 class AudioRecorder:
     """Manages audio recording using FFmpeg"""
     
-    def __init__(self, audio_folder):
+    def __init__(self, audio_folder,
+                 mic_device="Microphone (USB PnP Sound Device)",
+                 system_device="CABLE Output (VB-Audio Virtual Cable)",
+                 remove_silence=False):
         """
         Initialize audio recorder
         
         Args:
             audio_folder: Path object for audio output directory
+            mic_device: DirectShow name of the microphone
+            system_device: DirectShow name of the system audio loopback device
+            remove_silence: Cut long silences while recording to shrink the file
         """
         self.audio_folder = Path(audio_folder)
         self.recording = False
         self.ffmpeg_process = None
         self.recording_file = None
+        # Per-user cache location, so the install folder can stay read-only
+        cache_root = Path(os.environ.get('LOCALAPPDATA') or Path.home())
+        self._device_cache_path = cache_root / 'meeting-summarizer' / 'devices.json'
+        # FFmpeg warnings/errors from the latest recording, kept out of the uploaded folder
+        self._ffmpeg_log_path = cache_root / 'meeting-summarizer' / 'ffmpeg.log'
+        
+        # Resolve FFmpeg once so each spawn skips the PATH search
+        self.ffmpeg_bin = shutil.which('ffmpeg') or 'ffmpeg'
+        
+        # Everything but the output file is fixed, so build the command once
+        audio_filter = 'amix=inputs=2:duration=longest'
+        if remove_silence:
+            audio_filter += ',' + SILENCE_FILTER
+        self._ffmpeg_base = [
+            self.ffmpeg_bin,
+            '-nostats', '-loglevel', 'warning',  # Keep the log to problems, not progress
+            '-f', 'dshow',
+            '-i', f'audio={mic_device}',
+            '-f', 'dshow',
+            '-i', f'audio={system_device}',
+            '-filter_complex', audio_filter,
+            '-c:a', 'libmp3lame',  # Encode to MP3 while capturing; no WAV post-pass
+            '-b:a', '192k',
+            '-y'  # Overwrite output file if it exists
+        ]
         
-        # Ensure audio folder exists
-        self.audio_folder.mkdir(parents=True, exist_ok=True)
+        # Ensure audio folder exists; one stat in the usual case instead of a failing mkdir + stat
+        if not self.audio_folder.is_dir():
+            self.audio_folder.mkdir(parents=True, exist_ok=True)
     
     def generate_filename(self):
         """Generate filename with current datetime"""
         now = datetime.now()
-        timestamp = now.strftime("%Y%m%d_%H%M%S")
-        filename = f"recording_{timestamp}.wav"
-        return self.audio_folder / filename
+        return self.audio_folder / (
+            f"recording_{now.year:04d}{now.month:02d}{now.day:02d}"
+            f"_{now.hour:02d}{now.minute:02d}{now.second:02d}.mp3"
+        )
     
     def start_recording(self):
         """Start FFmpeg recording"""
@@ -43,26 +89,28 @@ class AudioRecorder:
         # Generate output filename
         self.recording_file = self.generate_filename()
         
-        # FFmpeg command
-        ffmpeg_cmd = [
-            'ffmpeg',
-            '-f', 'dshow',
-            '-i', 'audio=Microphone (USB PnP Sound Device)',
-            '-f', 'dshow', 
-            '-i', 'audio=CABLE Output (VB-Audio Virtual Cable)',
-            '-filter_complex', 'amix=inputs=2:duration=longest',
-            '-y',  # Overwrite output file if it exists
-            str(self.recording_file)
-        ]
+        ffmpeg_cmd = self._ffmpeg_base + [str(self.recording_file)]
         
         try:
-            self.ffmpeg_process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW  # Hide console window
-            )
+            # FFmpeg's stderr goes to a file rather than a pipe nobody reads, so it can never
+            # fill up and stall the recording; the log is overwritten on every start
+            try:
+                self._ffmpeg_log_path.parent.mkdir(parents=True, exist_ok=True)
+                ffmpeg_log = open(self._ffmpeg_log_path, 'wb')
+            except OSError:
+                ffmpeg_log = None
+            
+            try:
+                self.ffmpeg_process = subprocess.Popen(
+                    ffmpeg_cmd,
+                    stdin=subprocess.PIPE,  # Used to send 'q' for a graceful stop
+                    stdout=subprocess.DEVNULL,
+                    stderr=ffmpeg_log if ffmpeg_log else subprocess.DEVNULL,
+                    creationflags=subprocess.CREATE_NO_WINDOW  # Hide console window
+                )
+            finally:
+                if ffmpeg_log:
+                    ffmpeg_log.close()  # FFmpeg has its own handle now
             
             self.recording = True
             print(f"✓ Recording started: {self.recording_file.name}")
@@ -83,27 +131,38 @@ class AudioRecorder:
         # Stop FFmpeg process
         if self.ffmpeg_process:
             try:
-                self.ffmpeg_process.terminate()
+                # Ask FFmpeg to quit so it can flush the encoder and close the file
+                try:
+                    self.ffmpeg_process.stdin.write(b'q\n')
+                    self.ffmpeg_process.stdin.flush()
+                    self.ffmpeg_process.stdin.close()
+                except (OSError, ValueError):
+                    pass  # FFmpeg already exited
                 
-                # Wait for process to stop
+                # Wait for process to stop, escalating only if it doesn't respond
                 try:
                     self.ffmpeg_process.wait(timeout=5)
                 except subprocess.TimeoutExpired:
-                    self.ffmpeg_process.kill()
-                    self.ffmpeg_process.wait()
+                    self.ffmpeg_process.terminate()
+                    try:
+                        self.ffmpeg_process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        self.ffmpeg_process.kill()
+                        self.ffmpeg_process.wait()
                 
                 print("✓ Recording stopped")
                 
-                # Check if file exists and has content
-                if self.recording_file and os.path.exists(self.recording_file):
-                    file_size = os.path.getsize(self.recording_file)
-                    if file_size > 1024:  # Only consider valid if file has content
-                        return True, f"Recording stopped: {self.recording_file.name}"
-                    else:
-                        return False, "Recording file too small"
-                else:
+                # Check if file exists and has content (a single stat covers both)
+                try:
+                    file_size = os.stat(self.recording_file).st_size
+                except FileNotFoundError:
                     return False, "Recording file not found"
                 
+                if file_size > 1024:  # Only consider valid if file has content
+                    return True, f"Recording stopped: {self.recording_file.name}"
+                else:
+                    return False, "Recording file too small"
+                
             except Exception as e:
                 error_msg = f"Error stopping FFmpeg: {e}"
                 print(f"❌ {error_msg}")
@@ -111,6 +170,51 @@ class AudioRecorder:
         
         return True, "Recording stopped"
     
+    def list_audio_devices(self, refresh=False):
+        """
+        List DirectShow audio capture devices
+        
+        Enumerating devices means spawning FFmpeg, so the result is cached on
+        disk for DEVICE_CACHE_TTL and reused until it expires.
+        
+        Args:
+            refresh: Ignore the cache and query FFmpeg again
+            
+        Returns:
+            list: Device names as FFmpeg reports them
+        """
+        if not refresh:
+            try:
+                if time.time() - self._device_cache_path.stat().st_mtime < DEVICE_CACHE_TTL:
+                    return json.loads(self._device_cache_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                pass  # No usable cache; query FFmpeg
+        
+        result = subprocess.run(
+            [self.ffmpeg_bin, '-hide_banner', '-list_devices', 'true', '-f', 'dshow', '-i', 'dummy'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace',
+            timeout=10,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        devices = DSHOW_AUDIO_DEVICE.findall(result.stderr)
+        
+        # FFmpeg always exits non-zero on the dummy input, so an empty list is the only
+        # sign the probe failed; don't pin that for DEVICE_CACHE_TTL
+        if not devices:
+            print("⚠ No audio devices found; not caching the result")
+            return devices
+        
+        try:
+            self._device_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._device_cache_path.write_text(json.dumps(devices), encoding='utf-8')
+        except OSError as e:
+            print(f"⚠ Could not cache audio devices: {e}")
+        
+        return devices
+    
     def is_recording(self):
         """Check if currently recording"""
         return self.recording
@@ -7,23 +7,43 @@ It uses the existing WebhookUploader class for consistent file upload functional
 """
 
 import argparse
-import json
 import os
+import shutil
+import stat
+import subprocess
 import sys
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
-from webhook import WebhookUploader
+import requests
+from urllib3.util.retry import Retry
+
+from webhook import UploadAdapter, WebhookUploader
 from config import load_config
 
 
+class FileEntry(NamedTuple):
+    """An audio file with the stat data captured when it was discovered"""
+    path: Path
+    size: int
+    mtime: float
+
+
 class AudioSender:
     """Handles batch sending of audio files to n8n webhook"""
     
-    SUPPORTED_AUDIO_FORMATS = {'.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.wma'}
+    SUPPORTED_AUDIO_FORMATS = {'.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.wma'}
+    MAX_BATCH_BYTES = 20 * 1024 * 1024  # Keep each multipart batch request around 20 MB
+    DEFAULT_EXCLUDED_DIRS = frozenset({
+        '.git', 'node_modules', '__pycache__', 'System Volume Information', '$RECYCLE.BIN'
+    })
     
-    def __init__(self, webhook_url: str, credentials: dict, target_folder: str):
+    def __init__(self, webhook_url: str, credentials: dict, target_folder: str,
+                 compress_upload: bool = False):
         """
         Initialize AudioSender
         
@@ -31,83 +51,313 @@ class AudioSender:
             webhook_url: n8n webhook URL
             credentials: Authentication credentials dict
             target_folder: Path to folder containing audio files
+            compress_upload: Encode WAV files to Opus before uploading them
         """
         self.webhook_url = webhook_url
         self.credentials = credentials
         self.target_folder = Path(target_folder)
-        self.uploader = WebhookUploader(webhook_url, credentials)
+        self.compress_upload = compress_upload
+        
+        # One keep-alive session for the whole batch so each upload reuses the TLS connection
+        self._session = requests.Session()
+        self._pool_size = 0
+        self._size_connection_pool(4)
+        self.uploader = WebhookUploader(webhook_url, credentials, session=self._session)
+        # Deleting can stall on antivirus scans; do it off the upload threads
+        self._delete_pool = ThreadPoolExecutor(max_workers=2)
+        self._pending_deletes = []
+        # str.endswith accepts a tuple and checks every suffix in C
+        self._ext_tuple = tuple(e.lower() for e in self.SUPPORTED_AUDIO_FORMATS)
         
-        if not self.target_folder.exists():
-            raise FileNotFoundError(f"Target folder does not exist: {target_folder}")
+        # Resolve FFmpeg once; a PATH lookup is much cheaper than probing with 'ffmpeg -version'
+        self.ffmpeg_bin = shutil.which('ffmpeg')
+        if self.compress_upload and not self.ffmpeg_bin:
+            print("⚠ FFmpeg not found on PATH - uploading files uncompressed")
+            self.compress_upload = False
         
-        if not self.target_folder.is_dir():
+        # One stat answers both "exists?" and "is it a directory?"
+        try:
+            folder_mode = self.target_folder.stat().st_mode
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Target folder does not exist: {target_folder}") from None
+        
+        if not stat.S_ISDIR(folder_mode):
             raise NotADirectoryError(f"Target path is not a directory: {target_folder}")
     
-    def find_audio_files(self, recursive: bool = False) -> List[Path]:
+    def _size_connection_pool(self, workers: int):
+        """
+        Make sure the session's connection pool can serve every upload worker at once
+        
+        Args:
+            workers: Number of threads that will share the session
+        """
+        pool_size = max(4, workers)
+        if pool_size <= self._pool_size:
+            return
+        # urllib3 never retries POST on a status code, so only failed connects
+        # (before any of the body is sent) are retried here
+        adapter = UploadAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._pool_size = pool_size
+    
+    def _scandir_walk(self, root, excluded_dirs: FrozenSet[str] = frozenset(),
+                      max_depth: Optional[int] = None):
+        """
+        Walk a directory tree once, yielding supported audio files
+        
+        Args:
+            root: Directory to start the walk from
+            excluded_dirs: Directory names whose whole subtree is skipped
+            max_depth: Maximum subdirectory depth to descend into (None for unlimited)
+            
+        Yields:
+            FileEntry for each audio file found
+        """
+        stack = [(root, 0)]
+        while stack:
+            current, depth = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Prune during descent rather than filtering afterwards
+                            if entry.name in excluded_dirs:
+                                continue
+                            if max_depth is not None and depth >= max_depth:
+                                continue
+                            stack.append((entry.path, depth + 1))
+                        elif (entry.is_file(follow_symlinks=False) and
+                              entry.name.lower().endswith(self._ext_tuple)):
+                            st = entry.stat()
+                            yield FileEntry(Path(entry.path), st.st_size, st.st_mtime)
+            except OSError as e:
+                print(f"⚠ Cannot read directory {current}: {e}")
+    
+    def find_audio_files(self, recursive: bool = False,
+                         excluded_dirs: Optional[Iterable[str]] = None,
+                         max_depth: Optional[int] = None) -> List[FileEntry]:
         """
         Find all audio files in the target folder
         
         Args:
             recursive: Whether to search subdirectories recursively
+            excluded_dirs: Directory names to skip when recursive (default: DEFAULT_EXCLUDED_DIRS)
+            max_depth: Maximum subdirectory depth when recursive (None for unlimited)
             
         Returns:
-            List of Path objects for audio files
+            List of FileEntry tuples (path, size, mtime) for audio files
         """
-        audio_files = []
+        entries = []
         
         if recursive:
-            # Search recursively using glob pattern
-            for ext in self.SUPPORTED_AUDIO_FORMATS:
-                pattern = f"**/*{ext}"
-                audio_files.extend(self.target_folder.glob(pattern))
+            # Single traversal of the whole tree instead of one glob per extension
+            if excluded_dirs is None:
+                excluded_dirs = self.DEFAULT_EXCLUDED_DIRS
+            entries.extend(self._scandir_walk(self.target_folder, frozenset(excluded_dirs), max_depth))
         else:
             # Search only in the target directory
-            for file_path in self.target_folder.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in self.SUPPORTED_AUDIO_FORMATS:
-                    audio_files.append(file_path)
+            entries.extend(self._scandir_walk(self.target_folder, max_depth=0))
         
-        # Sort by modification time (oldest first)
-        audio_files.sort(key=lambda x: x.stat().st_mtime)
+        # Sort by modification time (oldest first) using the mtime captured during the scan
+        entries.sort(key=lambda entry: entry.mtime)
         
-        return audio_files
+        return entries
     
-    def send_audio_file(self, file_path: Path, delete_after_upload: bool = False) -> bool:
+    def compress_audio_file(self, file_path: Path) -> Optional[Path]:
+        """
+        Encode a WAV file to speech-tuned mono Opus in a private temp directory
+        
+        The copy never lands in the scanned folder, so it can't clobber a user's
+        own .opus file or be picked up by another upload worker. Remove it with
+        _discard_compressed.
+        
+        Args:
+            file_path: Path to the WAV file
+            
+        Returns:
+            Path to the .opus file, or None if the encoding failed
+        """
+        # Same file name as the source so the webhook still sees the recording's name
+        opus_path = Path(tempfile.mkdtemp(prefix='meeting-summarizer-')) / file_path.with_suffix('.opus').name
+        ffmpeg_cmd = [
+            self.ffmpeg_bin,
+            '-y',
+            '-i', str(file_path),
+            '-c:a', 'libopus',
+            '-b:a', '32k',
+            '-ac', '1',
+            '-application', 'voip',
+            str(opus_path)
+        ]
+        
+        try:
+            result = subprocess.run(
+                ffmpeg_cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except Exception as e:
+            print(f"⚠ Compression failed for {file_path.name}: {e}")
+            self._discard_compressed([opus_path])
+            return None
+        
+        if result.returncode != 0:
+            print(f"⚠ Compression failed for {file_path.name}: {result.stderr.strip()}")
+            self._discard_compressed([opus_path])
+            return None
+        
+        print(f"🗜️  Compressed: {file_path.name} -> {opus_path.name}")
+        return opus_path
+    
+    def _delete_later(self, paths: Iterable[Path]):
+        """
+        Queue files for deletion on the background delete pool
+        
+        Args:
+            paths: Files to delete
+        """
+        def delete():
+            for fp in paths:
+                try:
+                    fp.unlink(missing_ok=True)
+                    print(f"🗑️  Deleted: {fp.name}")
+                except Exception as e:
+                    print(f"❌ Failed to delete {fp.name}: {e}")
+        
+        self._pending_deletes.append(self._delete_pool.submit(delete))
+    
+    def _discard_compressed(self, paths: Iterable[Path]):
+        """
+        Queue compressed upload copies and their temp directories for removal
+        
+        Args:
+            paths: Files returned by compress_audio_file
+        """
+        paths = list(paths)
+        
+        def discard():
+            for fp in paths:
+                shutil.rmtree(fp.parent, ignore_errors=True)
+        
+        self._pending_deletes.append(self._delete_pool.submit(discard))
+    
+    def wait_for_deletes(self):
+        """Block until every queued deletion has finished"""
+        pending, self._pending_deletes = self._pending_deletes, []
+        wait(pending)
+    
+    def send_audio_file(self, entry: FileEntry, delete_after_upload: bool = False) -> bool:
         """
         Send a single audio file to n8n
         
         Args:
-            file_path: Path to the audio file
+            entry: The audio file, as returned by find_audio_files
             delete_after_upload: Whether to delete file after successful upload
             
         Returns:
             True if upload was successful, False otherwise
         """
+        file_path = entry.path
+        upload_path = file_path
         try:
             print(f"\n📁 Processing: {file_path.name}")
             
+            # WAV is ~30x larger than speech-quality Opus; fall back to the WAV if encoding fails
+            if self.compress_upload and file_path.suffix.lower() == '.wav':
+                upload_path = self.compress_audio_file(file_path) or file_path
+            
             # Use existing webhook uploader
             if delete_after_upload:
-                def delete_callback(file_to_delete):
-                    try:
-                        os.remove(file_to_delete)
-                        print(f"🗑️  Deleted: {Path(file_to_delete).name}")
-                        return True
-                    except Exception as e:
-                        print(f"❌ Failed to delete {Path(file_to_delete).name}: {e}")
-                        return False
+                def delete_callback(_):
+                    # Queue the Path object held here; the next upload doesn't wait on the delete.
+                    # A compressed copy is removed in the finally block either way
+                    self._delete_later([file_path])
+                    return True
                 
-                self.uploader.upload_file(str(file_path), delete_callback)
-            else:
-                self.uploader.upload_file(str(file_path))
-            
-            return True
+                return self.uploader.upload_file(upload_path, delete_callback)
+            return self.uploader.upload_file(upload_path)
             
         except Exception as e:
             print(f"❌ Failed to process {file_path.name}: {e}")
             return False
+        finally:
+            # The compressed copy is only an upload artifact
+            if upload_path != file_path:
+                self._discard_compressed([upload_path])
+    
+    def _group_into_batches(self, audio_files: List[FileEntry],
+                            batch_size: int) -> List[List[FileEntry]]:
+        """
+        Group files into batches of at most batch_size files and MAX_BATCH_BYTES
+        
+        Args:
+            audio_files: Files to group, in upload order
+            batch_size: Maximum number of files per batch
+            
+        Returns:
+            List of batches; a file larger than MAX_BATCH_BYTES gets a batch of its own
+        """
+        batches = []
+        current, current_bytes = [], 0
+        for entry in audio_files:
+            if current and (len(current) >= batch_size or
+                            current_bytes + entry.size > self.MAX_BATCH_BYTES):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(entry)
+            current_bytes += entry.size
+        if current:
+            batches.append(current)
+        return batches
+    
+    def send_batch(self, entries: List[FileEntry], delete_after_upload: bool = False) -> bool:
+        """
+        Send several audio files to n8n in a single multipart request
+        
+        Args:
+            entries: The audio files, as returned by find_audio_files
+            delete_after_upload: Whether to delete the files after a successful upload
+            
+        Returns:
+            True if the batch upload was successful, False otherwise
+        """
+        file_paths = [entry.path for entry in entries]
+        upload_paths = []
+        try:
+            print(f"\n📦 Processing batch: {', '.join(p.name for p in file_paths)}")
+            
+            for file_path in file_paths:
+                if self.compress_upload and file_path.suffix.lower() == '.wav':
+                    upload_paths.append(self.compress_audio_file(file_path) or file_path)
+                else:
+                    upload_paths.append(file_path)
+            
+            success = self.uploader.upload_files(upload_paths)
+            
+            if success and delete_after_upload:
+                self._delete_later(file_paths)
+            
+            return success
+            
+        except Exception as e:
+            print(f"❌ Failed to process batch: {e}")
+            return False
+        finally:
+            # Compressed copies are only upload artifacts
+            artifacts = [up for up, fp in zip(upload_paths, file_paths) if up != fp]
+            if artifacts:
+                self._discard_compressed(artifacts)
     
     def send_all_files(self, recursive: bool = False, delete_after_upload: bool = False, 
-                       delay_between_uploads: float = 0, auto_confirm: bool = False) -> dict:
+                       delay_between_uploads: float = 0, auto_confirm: bool = False,
+                       parallel: int = 1, excluded_dirs: Optional[Iterable[str]] = None,
+                       max_depth: Optional[int] = None, batch_size: int = 1) -> dict:
         """
         Send all audio files in the target folder to n8n
         
@@ -115,17 +365,26 @@ class AudioSender:
             recursive: Whether to search subdirectories recursively
             delete_after_upload: Whether to delete files after successful upload
             delay_between_uploads: Seconds to wait between uploads (to avoid overwhelming n8n)
-            auto_confirm: Skip user confirmation prompt (useful for tray integration)
+            auto_confirm: Skip user confirmation prompt (always skipped when stdin is not a TTY)
+            parallel: Number of concurrent uploads (with a delay, upload starts are spaced that far apart)
+            excluded_dirs: Directory names to skip when recursive (default: DEFAULT_EXCLUDED_DIRS)
+            max_depth: Maximum subdirectory depth when recursive (None for unlimited)
+            batch_size: Files per multipart request; values above 1 need a batch-aware n8n workflow
             
         Returns:
             Dictionary with success/failure statistics
         """
+        # Nobody can answer the prompt without a terminal (tray, scheduled task, pythonw)
+        if sys.stdin is None or not sys.stdin.isatty():
+            auto_confirm = True
+        
         print(f"🔍 Scanning for audio files in: {self.target_folder}")
         print(f"📂 Recursive search: {'Yes' if recursive else 'No'}")
         print(f"🗑️  Delete after upload: {'Yes' if delete_after_upload else 'No'}")
         print(f"⏱️  Delay between uploads: {delay_between_uploads}s")
+        print(f"🔀 Parallel uploads: {parallel}")
         
-        audio_files = self.find_audio_files(recursive)
+        audio_files = self.find_audio_files(recursive, excluded_dirs, max_depth)
         
         if not audio_files:
             print("📭 No audio files found in the target folder")
@@ -134,9 +393,8 @@ class AudioSender:
         print(f"\n📊 Found {len(audio_files)} audio file(s)")
         
         # Show file list
-        for i, file_path in enumerate(audio_files, 1):
-            file_size = file_path.stat().st_size / (1024 * 1024)  # MB
-            print(f"  {i}. {file_path.name} ({file_size:.2f} MB)")
+        for i, entry in enumerate(audio_files, 1):
+            print(f"  {i}. {entry.path.name} ({entry.size / (1024 * 1024):.2f} MB)")
         
         # Confirm before proceeding (skip if auto_confirm is True)
         if len(audio_files) > 1 and not auto_confirm:
@@ -148,27 +406,62 @@ class AudioSender:
         # Process files
         results = {"total": len(audio_files), "successful": 0, "failed": 0, "files": []}
         
-        for i, file_path in enumerate(audio_files, 1):
-            print(f"\n📋 Progress: {i}/{len(audio_files)}")
-            
-            success = self.send_audio_file(file_path, delete_after_upload)
-            
-            file_result = {
-                "filename": file_path.name,
-                "path": str(file_path),
-                "success": success
-            }
-            results["files"].append(file_result)
-            
-            if success:
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
-            
-            # Add delay between uploads if specified
-            if delay_between_uploads > 0 and i < len(audio_files):
-                print(f"⏳ Waiting {delay_between_uploads}s before next upload...")
-                time.sleep(delay_between_uploads)
+        def record_results(batch, success):
+            for entry in batch:
+                results["files"].append({
+                    "filename": entry.path.name,
+                    "path": str(entry.path),
+                    "success": success
+                })
+                if success:
+                    results["successful"] += 1
+                else:
+                    results["failed"] += 1
+        
+        if batch_size > 1:
+            batches = self._group_into_batches(audio_files, batch_size)
+            print(f"📦 Grouped into {len(batches)} upload request(s)")
+        else:
+            batches = [[entry] for entry in audio_files]
+        
+        # With several workers the delay spaces out upload starts instead of idling between them
+        pace_lock = threading.Lock()
+        next_start = [time.monotonic()]
+        
+        def send(batch):
+            if delay_between_uploads > 0 and workers > 1:
+                with pace_lock:
+                    start = max(next_start[0], time.monotonic())
+                    next_start[0] = start + delay_between_uploads
+                time.sleep(max(0.0, start - time.monotonic()))
+            if len(batch) == 1:
+                return self.send_audio_file(batch[0], delete_after_upload)
+            return self.send_batch(batch, delete_after_upload)
+        
+        workers = max(1, min(parallel, len(batches)))
+        self._size_connection_pool(workers)
+        
+        if workers == 1:
+            for i, batch in enumerate(batches, 1):
+                print(f"\n📋 Progress: {i}/{len(batches)}")
+                
+                record_results(batch, send(batch))
+                
+                # Add delay between uploads if specified
+                if delay_between_uploads > 0 and i < len(batches):
+                    print(f"⏳ Waiting {delay_between_uploads}s before next upload...")
+                    time.sleep(delay_between_uploads)
+        else:
+            # Uploads are network-bound, so threads overlap the time spent waiting on n8n
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(send, batch): batch for batch in batches}
+                for i, future in enumerate(as_completed(futures), 1):
+                    batch = futures[future]
+                    record_results(batch, future.result())
+                    print(f"\n📋 Progress: {i}/{len(batches)} ({', '.join(e.path.name for e in batch)})")
+        
+        # Let queued deletions finish before reporting
+        self.wait_for_deletes()
         
         # Print summary
         print(f"\n📊 Upload Summary:")
@@ -189,8 +482,12 @@ Examples:
   python audio_sender.py                           # Send files from config folder
   python audio_sender.py --folder ./recordings     # Send from specific folder
   python audio_sender.py --recursive               # Include subdirectories
+  python audio_sender.py -r --max-depth 2 --exclude old  # Limit depth, skip "old" dirs
   python audio_sender.py --delete                  # Delete after upload
-  python audio_sender.py --delay 2                 # Wait 2s between uploads
+  python audio_sender.py --delay 2 --parallel 1    # Serial uploads, 2s apart
+  python audio_sender.py --parallel 8              # Up to 8 concurrent uploads
+  python audio_sender.py --yes                     # Don't ask for confirmation
+  python audio_sender.py --batch-size 8            # 8 files per request (needs batch_upload)
         """
     )
     
@@ -206,6 +503,21 @@ Examples:
         help='Search subdirectories recursively'
     )
     
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='NAME',
+        help='Directory name to skip when recursive; repeatable '
+             '(always skips .git, node_modules, __pycache__, System Volume Information, $RECYCLE.BIN)'
+    )
+    
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        help='Maximum subdirectory depth when recursive (default: unlimited)'
+    )
+    
     parser.add_argument(
         '--delete', '-d',
         action='store_true',
@@ -219,6 +531,26 @@ Examples:
         help='Seconds to wait between uploads (default: 0)'
     )
     
+    parser.add_argument(
+        '--parallel', '-p',
+        type=int,
+        default=4,
+        help='Number of concurrent uploads; with --delay, upload starts are spaced out (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Files per upload request when batch_upload is enabled in config (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--yes', '-y',
+        action='store_true',
+        help='Upload without asking for confirmation'
+    )
+    
     parser.add_argument(
         '--config', '-c',
         type=str,
@@ -234,8 +566,7 @@ Examples:
             if not config_path.exists():
                 print(f"❌ Config file not found: {args.config}")
                 return 1
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            config = load_config(config_path)
         else:
             config = load_config()
         
@@ -264,16 +595,27 @@ Examples:
                 print("💡 Use --folder argument or add watch_folder to config.json")
                 return 1
         
+        # Batched requests need a matching n8n workflow, so they are opt-in via config
+        batch_size = args.batch_size if config.get('batch_upload', False) else 1
+        
         print(f"🚀 Audio Sender starting...")
         print(f"🔗 Webhook URL: {webhook_url}")
         print(f"📁 Target folder: {target_folder}")
         
         # Create and run audio sender
-        sender = AudioSender(webhook_url, credentials, target_folder)
+        sender = AudioSender(
+            webhook_url, credentials, target_folder,
+            compress_upload=config.get('compress_upload', False)
+        )
         results = sender.send_all_files(
             recursive=args.recursive,
             delete_after_upload=args.delete,
-            delay_between_uploads=args.delay
+            delay_between_uploads=args.delay,
+            auto_confirm=args.yes,
+            parallel=args.parallel,
+            excluded_dirs=AudioSender.DEFAULT_EXCLUDED_DIRS | set(args.exclude),
+            max_depth=args.max_depth,
+            batch_size=batch_size
         )
         
         # Return appropriate exit code
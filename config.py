@@ -1,13 +1,39 @@
-﻿import json
+﻿import codecs
+import copy
+import functools
+import json
 from pathlib import Path
 
-def load_config():
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path, mtime_ns):
+    """Parse a config file; cached per (path, mtime) so unchanged files aren't re-read"""
+    data = Path(path).read_bytes()
+    # Notepad saves UTF-8 with a BOM, which orjson rejects
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    return _loads(data)
+
+
+def load_config(config_path=None):
     """Load configuration from JSON file"""
     try:
-        config_path = Path(__file__).parent / "config.json"
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        if config_path is None:
+            config_path = Path(__file__).parent / "config.json"
+        config_path = Path(config_path)
+        # The cached dict is shared; hand out a copy so callers can't change it for everyone
+        return copy.deepcopy(_load_config_cached(str(config_path), config_path.stat().st_mtime_ns))
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
 
+
+def clear_config_cache():
+    """Drop all cached configurations so the next load re-reads from disk"""
+    _load_config_cached.cache_clear()
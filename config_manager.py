@@ -4,9 +4,10 @@ Configuration Manager for Meeting Recorder
 Handles loading and managing application configuration
 """
 
-import json
 from pathlib import Path
 
+from config import load_config, clear_config_cache
+
 
 class ConfigManager:
     """Manages application configuration loading and access"""
@@ -17,13 +18,7 @@ class ConfigManager:
     
     def load_config(self):
         """Load configuration from JSON file"""
-        try:
-            config_path = Path(__file__).parent / self.config_file
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            return {}
+        return load_config(Path(__file__).parent / self.config_file)
     
     def get_webhook_url(self):
         """Get the n8n webhook URL"""
@@ -38,11 +33,35 @@ class ConfigManager:
         folder_path = self.config.get("watch_folder", "D:\\study\\AI\\meeting-recorder\\audio")
         return Path(folder_path)
     
+    def get_audio_devices(self):
+        """Get the (microphone, system audio) DirectShow device names"""
+        return (
+            self.config.get("mic_device", "Microphone (USB PnP Sound Device)"),
+            self.config.get("system_device", "CABLE Output (VB-Audio Virtual Cable)")
+        )
+    
+    def get_remove_silence(self):
+        """Whether long silences are cut from recordings"""
+        return bool(self.config.get("remove_silence", False))
+    
+    def get_upload_concurrency(self):
+        """Get the maximum number of simultaneous uploads"""
+        return max(1, int(self.config.get("upload_concurrency", 4)))
+    
+    def get_batch_upload(self):
+        """Whether several files may be sent in one upload request"""
+        return bool(self.config.get("batch_upload", False))
+    
+    def get_gzip_wav_uploads(self):
+        """Whether WAV uploads are sent gzip-compressed"""
+        return bool(self.config.get("gzip_wav_uploads", False))
+    
     def get_config(self):
         """Get the full configuration dictionary"""
         return self.config
     
     def reload_config(self):
         """Reload configuration from file"""
+        clear_config_cache()
         self.config = self.load_config()
         return self.config
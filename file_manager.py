@@ -5,95 +5,437 @@ Handles file operations, upload functionality, and file deletion
 """
 
 import os
+import ctypes
+import hashlib
 import json
+import random
+import shutil
 import time
-import psutil
 import subprocess
+import zlib
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 from datetime import datetime
 from pathlib import Path
 
+from webhook import AUDIO_MIME_TYPES, UPLOAD_TIMEOUT, UploadAdapter
+
+# Read buffer for streaming uploads from disk
+UPLOAD_READ_BUFFER = 1024 * 1024
+
+# Upper bound on the combined size of one upload_batches request
+BATCH_MAX_BYTES = 20 * 1024 * 1024
+
+# Process name prefixes that can plausibly hold a recording open
+LOCK_SUSPECT_PREFIXES = ('ffmpeg', 'python')
+
+# MIME types worth gzipping on the wire; MP3 and other codecs are already compressed
+GZIP_MIME_TYPES = frozenset({'audio/wav'})
+
+# Files force_delete_file could only queue for deletion at reboot; they are still on
+# disk until then, so folder scans must not pick them up again
+PENDING_REBOOT_DELETES = set()
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+
+def _windows_delete_file(file_path):
+    """
+    Delete a file with the Win32 DeleteFileW call
+    
+    Args:
+        file_path: Path to the file to delete
+        
+    Returns:
+        bool: True if the file was deleted
+    """
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.DeleteFileW.argtypes = [ctypes.c_wchar_p]
+    kernel32.DeleteFileW.restype = ctypes.c_int
+    if kernel32.DeleteFileW(str(file_path)):
+        return True
+    print(f"❌ DeleteFileW failed: {ctypes.WinError(ctypes.get_last_error())}")
+    return False
+
+
+def _windows_delete_on_reboot(file_path):
+    """
+    Queue a file for deletion at the next reboot with MoveFileExW
+    
+    Returns immediately; needs write access to the PendingFileRenameOperations
+    registry value, which usually means running elevated.
+    
+    Args:
+        file_path: Path to the file to delete
+        
+    Returns:
+        bool: True if the deletion was scheduled
+    """
+    MOVEFILE_DELAY_UNTIL_REBOOT = 0x4
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.MoveFileExW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_uint]
+    kernel32.MoveFileExW.restype = ctypes.c_int
+    if kernel32.MoveFileExW(str(file_path), None, MOVEFILE_DELAY_UNTIL_REBOOT):
+        return True
+    print(f"❌ MoveFileExW failed: {ctypes.WinError(ctypes.get_last_error())}")
+    return False
+
+
+def _windows_who_locks(file_path):
+    """
+    Ask the Windows Restart Manager which processes hold a file open
+    
+    One RmGetList call returns the owning PIDs directly, instead of enumerating
+    the open files of every process on the system.
+    
+    Args:
+        file_path: Path to the locked file
+        
+    Returns:
+        list: PIDs of the processes using the file (empty if none or on error)
+    """
+    from ctypes import wintypes
+    
+    CCH_RM_SESSION_KEY = 32
+    CCH_RM_MAX_APP_NAME = 255
+    CCH_RM_MAX_SVC_NAME = 63
+    ERROR_MORE_DATA = 234
+    
+    class RM_UNIQUE_PROCESS(ctypes.Structure):
+        _fields_ = [('dwProcessId', wintypes.DWORD),
+                    ('ProcessStartTime', wintypes.FILETIME)]
+    
+    class RM_PROCESS_INFO(ctypes.Structure):
+        _fields_ = [('Process', RM_UNIQUE_PROCESS),
+                    ('strAppName', wintypes.WCHAR * (CCH_RM_MAX_APP_NAME + 1)),
+                    ('strServiceShortName', wintypes.WCHAR * (CCH_RM_MAX_SVC_NAME + 1)),
+                    ('ApplicationType', ctypes.c_int),
+                    ('AppStatus', wintypes.ULONG),
+                    ('TSSessionId', wintypes.DWORD),
+                    ('bRestartable', wintypes.BOOL)]
+    
+    rstrtmgr = ctypes.WinDLL('rstrtmgr')
+    session = wintypes.DWORD()
+    session_key = ctypes.create_unicode_buffer(CCH_RM_SESSION_KEY + 1)
+    if rstrtmgr.RmStartSession(ctypes.byref(session), 0, session_key) != 0:
+        return []
+    
+    try:
+        resources = (wintypes.LPCWSTR * 1)(str(file_path))
+        if rstrtmgr.RmRegisterResources(session, 1, resources, 0, None, 0, None) != 0:
+            return []
+        
+        needed = wintypes.UINT(0)
+        count = wintypes.UINT(0)
+        reasons = wintypes.DWORD()
+        result = rstrtmgr.RmGetList(session, ctypes.byref(needed), ctypes.byref(count),
+                                    None, ctypes.byref(reasons))
+        if result == 0:
+            return []  # Nobody holds the file
+        if result != ERROR_MORE_DATA:
+            return []
+        
+        infos = (RM_PROCESS_INFO * needed.value)()
+        count = wintypes.UINT(needed.value)
+        result = rstrtmgr.RmGetList(session, ctypes.byref(needed), ctypes.byref(count),
+                                    infos, ctypes.byref(reasons))
+        if result != 0:
+            return []
+        return [infos[i].Process.dwProcessId for i in range(count.value)]
+    finally:
+        rstrtmgr.RmEndSession(session)
+
+
+def find_locking_pids(file_path):
+    """
+    Find the processes (other than this one) that hold a file open
+    
+    Args:
+        file_path: Path to the locked file
+    
+    Returns:
+        list: PIDs of the processes using the file
+    """
+    if os.name == 'nt':
+        pids = _windows_who_locks(file_path)
+    else:
+        # No Restart Manager outside Windows; fall back to scanning open files,
+        # but only for processes whose name makes them a plausible holder
+        import psutil  # deferred: only needed once a delete has already failed
+        
+        pids = []
+        for proc in psutil.process_iter(['pid', 'name']):
+            if not (proc.info['name'] or '').lower().startswith(LOCK_SUSPECT_PREFIXES):
+                continue
+            try:
+                if any(f.path == str(file_path) for f in proc.open_files()):
+                    pids.append(proc.info['pid'])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+    
+    return [pid for pid in pids if pid != os.getpid()]
+
+
+def _idempotency_key(file_path, st):
+    """
+    Derive a stable key identifying one version of a file
+    
+    Args:
+        file_path: Path to the file
+        st: os.stat_result for the file
+    
+    Returns:
+        str: 32 hex characters; unchanged across retries of the same file
+    """
+    # Size + mtime tell versions apart; the first 4 KiB separate same-sized files
+    # written in the same instant without hashing the whole recording
+    digest = hashlib.blake2b(f"{st.st_size}:{st.st_mtime_ns}".encode(), digest_size=16)
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(4096))
+    return digest.hexdigest()
+
+
+def _batch_idempotency_key(member_keys):
+    """
+    Derive the key for a batch request from the keys of its files
+    
+    Args:
+        member_keys: _idempotency_key of each file, in request order
+    
+    Returns:
+        str: 32 hex characters; unchanged while the same files are batched together
+    """
+    return hashlib.blake2b(':'.join(member_keys).encode(), digest_size=16).hexdigest()
+
+
+def _gzip_stream(reader, chunk_size=UPLOAD_READ_BUFFER):
+    """
+    Gzip a file-like object on the fly
+    
+    Args:
+        reader: Object with a read(size) method (e.g. a MultipartEncoder)
+        chunk_size: Bytes read per step
+    
+    Yields:
+        bytes: Compressed chunks, ending with the gzip trailer
+    """
+    # Level 1: PCM gains little from harder compression and the CPU must keep up with the link
+    compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            break
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def is_pending_reboot_delete(file_path):
+    """
+    Check whether a file is only waiting for a reboot to be deleted
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        bool: True if force_delete_file scheduled it for deletion at reboot
+    """
+    return str(Path(file_path)) in PENDING_REBOOT_DELETES
+
+
+def force_delete_file(file_path, hint_proc=None):
+    """
+    Force delete a file, even if it's locked by processes
+    
+    Args:
+        file_path: Path to the file to delete
+        hint_proc: Optional subprocess.Popen that wrote the file (e.g. FFmpeg).
+            If it still holds the file, waiting for it to exit is tried
+            before looking up and killing other processes.
+    
+    Returns:
+        bool: True if the file is gone. False if it is still there, including when
+            it was only scheduled for deletion at reboot (see is_pending_reboot_delete)
+    """
+    max_attempts = 3
+    for attempt in range(max_attempts):
+        try:
+            # Try normal deletion first; a missing file needs no separate exists() check
+            os.remove(file_path)
+            print(f"🗑️ Successfully deleted: {Path(file_path).name}")
+            return True
+        
+        except FileNotFoundError:
+            print(f"✓ File doesn't exist: {file_path}")
+            return True
+        
+        except PermissionError as e:
+            print(f"⚠ Attempt {attempt + 1}/{max_attempts}: File is locked - {e}")
+            
+            if hint_proc is not None and hint_proc.poll() is None:
+                # Usually the lock is the writer that hasn't exited yet; give it a moment
+                try:
+                    hint_proc.wait(timeout=2)
+                    if attempt < max_attempts - 1:
+                        continue
+                    # Last attempt: the writer just let go, so retry here instead of
+                    # falling out of the loop without another try
+                    os.remove(file_path)
+                    print(f"🗑️ Successfully deleted: {Path(file_path).name}")
+                    return True
+                except FileNotFoundError:
+                    return True
+                except Exception:
+                    pass
+            
+            if attempt < max_attempts - 1:  # Not the last attempt
+                # Find and kill processes using this file
+                try:
+                    import psutil  # deferred: only needed once a delete has already failed
+                    
+                    killed_processes = []
+                    killed_procs = []
+                    for pid in find_locking_pids(file_path):
+                        try:
+                            proc = psutil.Process(pid)
+                            name = proc.name()
+                            print(f"🔪 Killing process: {name} (PID: {pid})")
+                            proc.kill()
+                            killed_processes.append(name)
+                            killed_procs.append(proc)
+                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                            continue
+                    
+                    if killed_processes:
+                        print(f"✓ Killed processes: {', '.join(killed_processes)}")
+                        # Retry as soon as they have exited rather than after a fixed pause
+                        psutil.wait_procs(killed_procs, timeout=3)
+                    else:
+                        print("⚠ No processes found using the file")
+                
+                except Exception as kill_error:
+                    print(f"⚠ Error finding/killing processes: {kill_error}")
+                    time.sleep(2)  # Wait and retry
+            else:
+                # Last attempt - call DeleteFileW directly instead of spawning cmd.exe
+                try:
+                    if _windows_delete_file(file_path):
+                        print(f"🗑️ Force deleted via DeleteFileW: {Path(file_path).name}")
+                        return True
+                    # Still locked: let Windows remove it at reboot rather than keep waiting.
+                    # The file stays on disk until then, so this is not a successful delete.
+                    if _windows_delete_on_reboot(file_path):
+                        PENDING_REBOOT_DELETES.add(str(Path(file_path)))
+                        print(f"🕓 Deletion pending reboot: {Path(file_path).name}")
+                        return False
+                except Exception as win_error:
+                    print(f"❌ DeleteFileW error: {win_error}")
+        
+        except Exception as e:
+            print(f"❌ Attempt {attempt + 1}/{max_attempts}: Unexpected error - {e}")
+            if attempt < max_attempts - 1:
+                time.sleep(1)
+    
+    print(f"❌ Failed to delete file after {max_attempts} attempts: {file_path}")
+    return False
+
 
 class FileManager:
     """Manages file operations, uploads, and deletions"""
     
-    def __init__(self, webhook_url, credentials):
+    # Responses worth retrying; any other non-200 status is treated as permanent
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    MAX_UPLOAD_ATTEMPTS = 5
+    RETRY_BASE_DELAY = 1  # seconds
+    RETRY_MAX_DELAY = 30  # seconds
+    
+    def __init__(self, webhook_url, credentials, gzip_wav=False, upload_concurrency=4):
         """
         Initialize file manager
         
         Args:
             webhook_url: URL for uploading files
             credentials: Dictionary with username/password for authentication
+            gzip_wav: Send WAV uploads with Content-Encoding: gzip (the webhook must accept it)
+            upload_concurrency: Number of uploads upload_many will run at once
         """
         self.webhook_url = webhook_url
         self.credentials = credentials
+        self.gzip_wav = gzip_wav
+        
+        # Reuse connections across uploads instead of a new TCP+TLS handshake per file
+        self.session = requests.Session()
+        self._pool_size = 0
+        self._size_connection_pool(upload_concurrency)
+        
+        # Credentials are the same for every upload, so attach them to the session once
+        username = credentials.get("username", "")
+        password = credentials.get("password", "")
+        self.session.auth = (username, password) if username and password else None
+        
+        # Resolve FFmpeg once so each conversion skips the PATH search
+        self.ffmpeg_bin = shutil.which('ffmpeg') or 'ffmpeg'
     
-    def force_delete_file(self, file_path):
-        """Force delete a file, even if it's locked by processes"""
-        if not os.path.exists(file_path):
-            print(f"✓ File doesn't exist: {file_path}")
-            return True
+    def _size_connection_pool(self, workers):
+        """
+        Make sure the session's connection pool can serve every upload worker at once
         
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                # Try normal deletion first
-                os.remove(file_path)
-                print(f"🗑️ Successfully deleted: {Path(file_path).name}")
-                return True
-                
-            except PermissionError as e:
-                print(f"⚠ Attempt {attempt + 1}/{max_attempts}: File is locked - {e}")
-                
-                if attempt < max_attempts - 1:  # Not the last attempt
-                    # Find and kill processes using this file
-                    try:
-                        killed_processes = []
-                        for proc in psutil.process_iter(['pid', 'name', 'open_files']):
-                            try:
-                                if proc.info['open_files']:
-                                    for file_info in proc.info['open_files']:
-                                        if file_info.path == str(file_path):
-                                            print(f"🔪 Killing process: {proc.info['name']} (PID: {proc.info['pid']})")
-                                            proc.kill()
-                                            killed_processes.append(proc.info['name'])
-                                            break
-                            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                                continue
-                        
-                        if killed_processes:
-                            print(f"✓ Killed processes: {', '.join(killed_processes)}")
-                            time.sleep(1)  # Wait for processes to die
-                        else:
-                            print("⚠ No processes found using the file")
-                            
-                    except Exception as kill_error:
-                        print(f"⚠ Error finding/killing processes: {kill_error}")
-                        time.sleep(2)  # Wait and retry
-                else:
-                    # Last attempt - try Windows-specific force delete
-                    try:
-                        result = subprocess.run(
-                            ['cmd', '/c', 'del', '/f', '/q', str(file_path)],
-                            capture_output=True,
-                            text=True,
-                            timeout=10
-                        )
-                        if result.returncode == 0:
-                            print(f"🗑️ Force deleted via CMD: {Path(file_path).name}")
-                            return True
-                        else:
-                            print(f"❌ CMD delete failed: {result.stderr}")
-                    except Exception as cmd_error:
-                        print(f"❌ CMD delete error: {cmd_error}")
-                    
-            except Exception as e:
-                print(f"❌ Attempt {attempt + 1}/{max_attempts}: Unexpected error - {e}")
-                if attempt < max_attempts - 1:
-                    time.sleep(1)
+        Args:
+            workers: Number of threads that will share the session
+        """
+        pool_size = max(8, workers)
+        if pool_size <= self._pool_size:
+            return
+        # urllib3 doesn't retry POST on a status code, so the Retry only covers quick
+        # reconnects; upload_file does the backed-off retries for statuses and timeouts.
+        adapter = UploadAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.5)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._pool_size = pool_size
+    
+    def force_delete_file(self, file_path, hint_proc=None):
+        """
+        Force delete a file, even if it's locked by processes
         
-        print(f"❌ Failed to delete file after {max_attempts} attempts: {file_path}")
-        return False
+        Args:
+            file_path: Path to the file to delete
+            hint_proc: Optional subprocess.Popen that wrote the file
+            
+        Returns:
+            bool: True if the file is gone (False if deletion is pending reboot)
+        """
+        return force_delete_file(file_path, hint_proc)
+    
+    def _deleted_message(self, file_path, deleted):
+        """
+        Describe the outcome of deleting a file after its upload
+        
+        Args:
+            file_path: Path to the uploaded file
+            deleted: Result of force_delete_file
+            
+        Returns:
+            str: Message for the user
+        """
+        name = Path(file_path).name
+        if deleted:
+            return f"File uploaded and deleted: {name}"
+        if is_pending_reboot_delete(file_path):
+            return f"File uploaded, deletion pending reboot: {name}"
+        return f"File uploaded but not deleted: {name}"
     
     def upload_file(self, file_path):
         """
@@ -107,7 +449,8 @@ class FileManager:
         """
         try:
             file_info = Path(file_path)
-            file_size = file_info.stat().st_size
+            st = file_info.stat()
+            file_size = st.st_size
             
             print(f"📤 Uploading: {file_info.name} ({file_size / (1024 * 1024):.2f} MB)")
             
@@ -120,17 +463,12 @@ class FileManager:
                     "path": str(file_path),
                     "size_bytes": file_size,
                     "size_mb": round(file_size / (1024 * 1024), 2),
-                    "created": datetime.fromtimestamp(file_info.stat().st_ctime).isoformat(),
-                    "modified": datetime.fromtimestamp(file_info.stat().st_mtime).isoformat()
+                    "created": datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
                 },
                 "source": "tray_recorder"
             }
             
-            # Get credentials
-            username = self.credentials.get("username", "")
-            password = self.credentials.get("password", "")
-            
-            # Upload with authentication
             # Determine MIME type based on file extension
             extension = file_info.suffix.lower()
             if extension == '.mp3':
@@ -140,40 +478,210 @@ class FileManager:
             else:
                 mime_type = 'application/octet-stream'
 
-            with open(file_path, 'rb') as f:
-                files = {
-                    'data': (file_info.name, f, mime_type),
-                    'metadata': (None, json.dumps(metadata), 'application/json')
-                }
-                
-                auth = (username, password) if username and password else None
-                
-                response = requests.post(
-                    self.webhook_url,
-                    files=files,
-                    auth=auth,
-                    timeout=60
-                )
-            
-            if response.status_code == 200:
+            metadata_bytes = _dumps(metadata)
+            
+            # Sent with every attempt so the webhook can drop a retried duplicate
+            # (e.g. the first attempt arrived but its response timed out)
+            idempotency_key = _idempotency_key(file_path, st)
+            
+            success, error_msg = self._post_with_retry(
+                lambda: self._post_file(file_path, file_info.name, mime_type, metadata_bytes,
+                                        idempotency_key)
+            )
+            if success:
                 print("✅ Upload successful")
                 return True, "Upload successful"
+            
+            print(f"❌ {error_msg}")
+            return False, error_msg
+            
+        except Exception as e:
+            error_msg = f"Upload error: {e}"
+            print(f"❌ {error_msg}")
+            return False, error_msg
+    
+    def _post_with_retry(self, send):
+        """
+        Call send() until the webhook accepts it, backing off between attempts
+        
+        Timeouts, connection errors and RETRY_STATUS_CODES are retried; any
+        other status fails immediately.
+        
+        Args:
+            send: Callable that performs one POST and returns the response
+            
+        Returns:
+            tuple: (success: bool, error_message: str | None)
+        """
+        error_msg = None
+        for attempt in range(1, self.MAX_UPLOAD_ATTEMPTS + 1):
+            try:
+                response = send()
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error_msg = f"Upload error: {e}"
             else:
+                if response.status_code == 200:
+                    return True, None
                 error_msg = f"Upload failed: {response.status_code}"
-                print(f"❌ {error_msg}")
-                return False, error_msg
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    break
+            
+            if attempt < self.MAX_UPLOAD_ATTEMPTS:
+                # Exponential backoff with jitter so retries don't hammer a struggling server
+                delay = min(self.RETRY_MAX_DELAY,
+                            self.RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random() * 0.5))
+                print(f"⚠ {error_msg} - retrying in {delay:.1f}s "
+                      f"(attempt {attempt}/{self.MAX_UPLOAD_ATTEMPTS})")
+                time.sleep(delay)
+        
+        return False, error_msg
+    
+    def _post_file(self, file_path, file_name, mime_type, metadata_bytes, idempotency_key=None):
+        """
+        POST a file and its metadata to the webhook once
+        
+        Args:
+            file_path: Path to the file to upload
+            file_name: Name to send for the file part
+            mime_type: MIME type of the file part
+            metadata_bytes: Serialized metadata JSON
+            idempotency_key: Optional value for the X-Idempotency-Key header
+            
+        Returns:
+            requests.Response from the webhook
+        """
+        with open(file_path, 'rb', buffering=UPLOAD_READ_BUFFER) as f:
+            # Stream the multipart body from disk so the upload starts immediately
+            # and memory stays flat regardless of recording size
+            encoder = MultipartEncoder(fields={
+                'data': (file_name, f, mime_type),
+                'metadata': (None, metadata_bytes, 'application/json')
+            })
+            headers = {'Content-Type': encoder.content_type}
+            if idempotency_key:
+                headers['X-Idempotency-Key'] = idempotency_key
+            body = encoder
+            
+            # Raw PCM shrinks noticeably; compressed formats would only burn CPU
+            if self.gzip_wav and mime_type in GZIP_MIME_TYPES:
+                headers['Content-Encoding'] = 'gzip'
+                body = _gzip_stream(encoder)
+            
+            return self.session.post(
+                self.webhook_url,
+                data=body,
+                headers=headers,
+                timeout=UPLOAD_TIMEOUT
+            )
+    
+    def upload_files(self, file_paths):
+        """
+        Upload several recordings in one multipart request as data0, data1, ...
+        
+        Goes through the same retries as upload_file. The request carries one
+        X-Idempotency-Key derived from its files' keys, and each file's own key is
+        listed in the metadata, so the webhook can also drop a later single-file
+        upload of a file it already received in a batch.
+        
+        Args:
+            file_paths: Paths of the files to upload
+            
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        try:
+            files_meta = []
+            member_keys = []
+            for file_path in file_paths:
+                file_info = Path(file_path)
+                st = file_info.stat()
+                key = _idempotency_key(file_path, st)
+                member_keys.append(key)
+                files_meta.append({
+                    "name": file_info.name,
+                    "path": str(file_path),
+                    "size_bytes": st.st_size,
+                    "size_mb": round(st.st_size / (1024 * 1024), 2),
+                    "created": datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    "idempotency_key": key
+                })
+            
+            total_mb = sum(m["size_bytes"] for m in files_meta) / (1024 * 1024)
+            print(f"📤 Uploading batch of {len(files_meta)} files ({total_mb:.2f} MB)")
+            
+            metadata_bytes = _dumps({
+                "event": "tray_recording_batch",
+                "timestamp": datetime.now().isoformat(),
+                "files": files_meta,
+                "source": "tray_recorder"
+            })
+            idempotency_key = _batch_idempotency_key(member_keys)
+            
+            success, error_msg = self._post_with_retry(
+                lambda: self._post_files(file_paths, metadata_bytes, idempotency_key)
+            )
+            if success:
+                print("✅ Batch upload successful")
+                return True, "Batch upload successful"
+            
+            print(f"❌ {error_msg}")
+            return False, error_msg
             
         except Exception as e:
-            error_msg = f"Upload error: {e}"
+            error_msg = f"Batch upload error: {e}"
             print(f"❌ {error_msg}")
             return False, error_msg
     
-    def upload_and_delete_file(self, file_path):
+    def _post_files(self, file_paths, metadata_bytes, idempotency_key):
+        """
+        POST several files and their combined metadata to the webhook once
+        
+        Args:
+            file_paths: Paths of the files to upload
+            metadata_bytes: Serialized batch metadata JSON
+            idempotency_key: Value for the X-Idempotency-Key header
+            
+        Returns:
+            requests.Response from the webhook
+        """
+        with ExitStack() as stack:
+            fields = []
+            mime_types = set()
+            for i, file_path in enumerate(file_paths):
+                file_info = Path(file_path)
+                mime_type = AUDIO_MIME_TYPES.get(file_info.suffix.lower(), 'application/octet-stream')
+                mime_types.add(mime_type)
+                f = stack.enter_context(open(file_path, 'rb', buffering=UPLOAD_READ_BUFFER))
+                fields.append((f'data{i}', (file_info.name, f, mime_type)))
+            fields.append(('metadata', (None, metadata_bytes, 'application/json')))
+            
+            encoder = MultipartEncoder(fields=fields)
+            headers = {
+                'Content-Type': encoder.content_type,
+                'X-Idempotency-Key': idempotency_key
+            }
+            body = encoder
+            
+            # Same rule as _post_file: only worth it when the batch carries raw PCM
+            if self.gzip_wav and mime_types & GZIP_MIME_TYPES:
+                headers['Content-Encoding'] = 'gzip'
+                body = _gzip_stream(encoder)
+            
+            return self.session.post(
+                self.webhook_url,
+                data=body,
+                headers=headers,
+                timeout=UPLOAD_TIMEOUT
+            )
+    
+    def upload_and_delete_file(self, file_path, hint_proc=None):
         """
         Upload a file and delete it after successful upload
         
         Args:
             file_path: Path to the file to upload and delete
+            hint_proc: Optional process that wrote the file, passed to force_delete_file
             
         Returns:
             tuple: (success: bool, message: str)
@@ -183,13 +691,79 @@ class FileManager:
         
         if upload_success:
             # Force delete file after successful upload
-            if self.force_delete_file(file_path):
-                return True, f"File uploaded and deleted: {Path(file_path).name}"
-            else:
-                return True, f"File uploaded but not deleted: {Path(file_path).name}"
+            deleted = self.force_delete_file(file_path, hint_proc)
+            return True, self._deleted_message(file_path, deleted)
         else:
             return False, upload_message
 
+    def upload_batches(self, file_paths, batch_size=8):
+        """
+        Upload and delete files several at a time in single multipart requests
+        
+        Files are grouped in order into batches of at most batch_size files and
+        BATCH_MAX_BYTES. The webhook must read the data0, data1, ... parts. Each
+        batch goes through upload_files (retries, idempotency key); if it still
+        fails, its files are sent one by one.
+        
+        Args:
+            file_paths: Paths of the files to upload
+            batch_size: Maximum number of files per request
+            
+        Yields:
+            tuple: (file_path, success: bool, message: str) as each file finishes
+        """
+        batches = []
+        current, current_bytes = [], 0
+        for file_path in file_paths:
+            try:
+                size = os.stat(file_path).st_size
+            except OSError as e:
+                # Gone since it was listed (e.g. sent by another job); the rest still go
+                yield file_path, False, f"File not available: {e}"
+                continue
+            if current and (len(current) >= batch_size or current_bytes + size > BATCH_MAX_BYTES):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(file_path)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        
+        for batch in batches:
+            if len(batch) > 1 and self.upload_files(batch)[0]:
+                for file_path in batch:
+                    deleted = self.force_delete_file(file_path)
+                    yield file_path, True, self._deleted_message(file_path, deleted)
+                continue
+            
+            # Single file, or the webhook rejected the batch: fall back to one request per file
+            for file_path in batch:
+                success, message = self.upload_and_delete_file(file_path)
+                yield file_path, success, message
+
+    def upload_many(self, file_paths, max_workers=4):
+        """
+        Upload and delete several files concurrently over the shared session
+        
+        Args:
+            file_paths: Paths of the files to upload
+            max_workers: Maximum number of uploads in flight at once
+            
+        Yields:
+            tuple: (file_path, success: bool, message: str) as each upload finishes
+        """
+        workers = max(1, min(max_workers, len(file_paths)))
+        # More workers than pooled connections would queue on the pool instead of uploading
+        self._size_connection_pool(workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.upload_and_delete_file, file_path): file_path
+                for file_path in file_paths
+            }
+            for future in as_completed(futures):
+                success, message = future.result()
+                yield futures[future], success, message
+    
     def convert_wav_to_mp3(self, wav_path, bitrate='192k'):
         """
         Convert a WAV file to MP3 using FFmpeg.
@@ -208,36 +782,63 @@ class FileManager:
             if source_path.suffix.lower() != '.wav':
                 return False, None, "Input file is not a WAV file"
 
-            mp3_path = source_path.with_suffix('.mp3')
-
-            # Build FFmpeg command
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-y',  # overwrite output
-                '-i', str(source_path),
-                '-codec:a', 'libmp3lame',
-                '-b:a', str(bitrate),
-                str(mp3_path)
-            ]
-
-            result = subprocess.run(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
+            process, mp3_path = self.convert_wav_to_mp3_async(source_path, bitrate)
+            _, stderr = process.communicate()
 
-            if result.returncode != 0:
-                return False, None, f"FFmpeg conversion failed: {result.stderr.strip()}"
+            if process.returncode != 0:
+                return False, None, f"FFmpeg conversion failed: {stderr.decode(errors='replace').strip()}"
 
-            if not mp3_path.exists() or mp3_path.stat().st_size <= 1024:
+            try:
+                mp3_size = mp3_path.stat().st_size
+            except FileNotFoundError:
+                mp3_size = 0
+            if mp3_size <= 1024:
                 return False, None, "Converted MP3 file is missing or too small"
 
             return True, str(mp3_path), f"Converted to MP3: {mp3_path.name}"
         except Exception as e:
             return False, None, f"Conversion error: {e}"
     
+    def convert_wav_to_mp3_async(self, wav_path, bitrate='192k'):
+        """
+        Start converting a WAV file to MP3 without waiting for FFmpeg.
+        
+        The caller owns the returned process: poll() it or call communicate()
+        to collect the (error-only) stderr output once it exits.
+        
+        Args:
+            wav_path: Path to the source WAV file (str or Path)
+            bitrate: Audio bitrate for MP3 (e.g., '128k', '192k')
+        
+        Returns:
+            tuple: (process: subprocess.Popen, mp3_path: Path)
+        """
+        source_path = Path(wav_path)
+        mp3_path = source_path.with_suffix('.mp3')
+
+        # Build FFmpeg command
+        ffmpeg_cmd = [
+            self.ffmpeg_bin,
+            '-y',  # overwrite output
+            '-loglevel', 'error',  # keep stderr small so an unread pipe can't fill up
+            '-i', str(source_path),
+            '-codec:a', 'libmp3lame',
+            '-b:a', str(bitrate),
+            str(mp3_path)
+        ]
+
+        process = subprocess.Popen(
+            ffmpeg_cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        return process, mp3_path
+    
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self.session.close()
+    
     def open_folder(self, folder_path):
         """
         Open a folder in the file explorer
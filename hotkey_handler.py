@@ -4,21 +4,85 @@ Hotkey Handler for Meeting Recorder
 Handles global keyboard shortcuts and hotkey management
 """
 
-import keyboard
+import ctypes
+import os
+import threading
+from ctypes import wintypes
+
+# Win32 constants for RegisterHotKey
+MOD_ALT = 0x0001
+MOD_CONTROL = 0x0002
+MOD_SHIFT = 0x0004
+MOD_WIN = 0x0008
+MOD_NOREPEAT = 0x4000
+WM_QUIT = 0x0012
+WM_HOTKEY = 0x0312
+PM_NOREMOVE = 0x0000
+HOTKEY_ID = 1
+
+_MODIFIERS = {
+    'ctrl': MOD_CONTROL,
+    'control': MOD_CONTROL,
+    'shift': MOD_SHIFT,
+    'alt': MOD_ALT,
+    'win': MOD_WIN,
+    'windows': MOD_WIN,
+}
+
+
+def _parse_hotkey(hotkey):
+    """
+    Translate a 'ctrl+shift+m' style string into RegisterHotKey arguments
+    
+    Args:
+        hotkey: Hotkey combination string
+        
+    Returns:
+        tuple: (modifiers, virtual_key_code), or None if the combination
+        can't be expressed as a single Win32 hotkey
+    """
+    modifiers = MOD_NOREPEAT
+    vk = None
+    for part in hotkey.lower().replace(' ', '').split('+'):
+        if part in _MODIFIERS:
+            modifiers |= _MODIFIERS[part]
+        elif vk is None and len(part) == 1 and part.isalnum():
+            vk = ord(part.upper())
+        elif vk is None and part[:1] == 'f' and part[1:].isdigit() and 1 <= int(part[1:]) <= 24:
+            vk = 0x6F + int(part[1:])  # VK_F1 is 0x70
+        else:
+            return None
+    return (modifiers, vk) if vk is not None else None
 
 
 class HotkeyHandler:
     """Manages global keyboard shortcuts"""
     
-    def __init__(self, toggle_callback):
+    # Seconds setup_hotkey waits for the message thread to report
+    REGISTER_TIMEOUT = 2
+    
+    def __init__(self, toggle_callback, on_error=None):
         """
         Initialize hotkey handler
         
         Args:
             toggle_callback: Function to call when hotkey is pressed
+            on_error: Optional function(title, message) told when the hotkey
+                could not be registered, including after setup_hotkey returned
         """
         self.toggle_callback = toggle_callback
+        self.on_error = on_error
         self.hotkey_registered = False
+        
+        # Set while a RegisterHotKey message loop is running
+        self._hotkey_thread_id = None
+        self._win_hotkey = None
+        
+        # Hands the registration result over between setup_hotkey and the message
+        # thread; if setup stopped waiting, the thread reports the result itself
+        self._register_lock = threading.Lock()
+        self._register_error = None
+        self._setup_gave_up = False
     
     def setup_hotkey(self, hotkey='ctrl+shift+m'):
         """
@@ -28,18 +92,56 @@ class HotkeyHandler:
             hotkey: Hotkey combination string (default: 'ctrl+shift+r')
             
         Returns:
-            bool: True if hotkey was registered successfully
+            bool: True if hotkey was registered successfully. False on failure
+            (reported through on_error) or if registration didn't finish within
+            REGISTER_TIMEOUT; the message thread then reports the outcome later.
         """
-        try:
-            # Register the hotkey
-            keyboard.add_hotkey(hotkey, self.toggle_callback)
-            print(f"✓ Hotkey registered: {hotkey}")
-            self.hotkey_registered = True
-            return True
-        except Exception as e:
-            print(f"⚠ Could not register hotkey: {e}")
+        # RegisterHotKey: the OS only wakes us for this combination, whereas a
+        # low-level keyboard hook inspects every key press system-wide
+        parsed = _parse_hotkey(hotkey) if os.name == 'nt' else None
+        if not parsed:
+            self._report_failure(hotkey, "unsupported combination")
             self.hotkey_registered = False
             return False
+        
+        registered = threading.Event()
+        self._register_error = None
+        self._setup_gave_up = False
+        threading.Thread(
+            target=self._hotkey_loop, args=(hotkey, *parsed, registered), daemon=True
+        ).start()
+        if not registered.wait(timeout=self.REGISTER_TIMEOUT):
+            with self._register_lock:
+                self._setup_gave_up = not registered.is_set()
+            if self._setup_gave_up:
+                # _hotkey_loop reports success or failure once RegisterHotKey returns
+                print(f"⚠ Hotkey registration is taking long: {hotkey}")
+                self.hotkey_registered = False
+                return False
+        
+        if self._register_error is None:
+            self._registration_succeeded(hotkey)
+            return True
+        
+        self._report_failure(hotkey, self._register_error)
+        self.hotkey_registered = False
+        return False
+    
+    def _registration_succeeded(self, hotkey):
+        """Record a registered hotkey"""
+        print(f"✓ Hotkey registered: {hotkey}")
+        self._win_hotkey = hotkey
+        self.hotkey_registered = True
+    
+    def _report_failure(self, hotkey, reason):
+        """Tell the user the hotkey won't work"""
+        message = f"Could not register hotkey {hotkey}: {reason}"
+        print(f"⚠ {message}")
+        if self.on_error:
+            try:
+                self.on_error("Hotkey Unavailable", f"{message}. Use the tray menu to record.")
+            except Exception as e:
+                print(f"⚠ Could not report hotkey error: {e}")
     
     def remove_hotkey(self, hotkey='ctrl+shift+m'):
         """
@@ -52,7 +154,9 @@ class HotkeyHandler:
             bool: True if hotkey was removed successfully
         """
         try:
-            keyboard.remove_hotkey(hotkey)
+            if hotkey != self._win_hotkey:
+                raise ValueError(f"'{hotkey}' is not registered")
+            self._stop_hotkey_loop()
             print(f"✓ Hotkey removed: {hotkey}")
             self.hotkey_registered = False
             return True
@@ -60,6 +164,55 @@ class HotkeyHandler:
             print(f"⚠ Could not remove hotkey: {e}")
             return False
     
+    def _hotkey_loop(self, hotkey, modifiers, vk, registered):
+        """
+        Register a Win32 hotkey and dispatch WM_HOTKEY messages (runs in background)
+        
+        RegisterHotKey with no window posts to the registering thread's queue,
+        so registration, the message loop and unregistration all stay here.
+        """
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32')
+        msg = wintypes.MSG()
+        
+        # Make sure this thread has a message queue before anyone posts WM_QUIT to it
+        user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_NOREMOVE)
+        
+        ok = user32.RegisterHotKey(None, HOTKEY_ID, modifiers, vk)
+        with self._register_lock:
+            if ok:
+                self._hotkey_thread_id = kernel32.GetCurrentThreadId()
+            else:
+                self._register_error = str(ctypes.WinError(ctypes.get_last_error()))
+            registered.set()
+            gave_up = self._setup_gave_up
+        
+        if gave_up:
+            # setup_hotkey already returned; the result is ours to report
+            if ok:
+                self._registration_succeeded(hotkey)
+            else:
+                self._report_failure(hotkey, self._register_error)
+        if not ok:
+            return
+        
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY:
+                    try:
+                        self.toggle_callback()
+                    except Exception as e:
+                        print(f"⚠ Hotkey callback error: {e}")
+        finally:
+            user32.UnregisterHotKey(None, HOTKEY_ID)
+    
+    def _stop_hotkey_loop(self):
+        """Ask the RegisterHotKey thread to unregister and exit"""
+        if self._hotkey_thread_id:
+            ctypes.WinDLL('user32').PostThreadMessageW(self._hotkey_thread_id, WM_QUIT, 0, 0)
+            self._hotkey_thread_id = None
+            self._win_hotkey = None
+    
     def is_hotkey_registered(self):
         """Check if hotkey is currently registered"""
         return self.hotkey_registered
@@ -67,7 +220,7 @@ class HotkeyHandler:
     def cleanup(self):
         """Clean up all registered hotkeys"""
         try:
-            keyboard.unhook_all_hotkeys()
+            self._stop_hotkey_loop()
             self.hotkey_registered = False
             print("✓ All hotkeys cleaned up")
             return True
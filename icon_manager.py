@@ -4,14 +4,24 @@ Icon Manager for Meeting Recorder
 Handles system tray icon creation and management
 """
 
+import queue
+import threading
+from pathlib import Path
+
 import pystray
 from pystray import MenuItem as item
-from PIL import Image, ImageDraw
+from PIL import Image
+
+# Prebuilt 64x64 RGBA tray icons
+ICONS_DIR = Path(__file__).parent / 'icons'
 
 
 class IconManager:
     """Manages system tray icon creation and updates"""
     
+    # Seconds to wait for further status changes before touching the tray
+    UPDATE_DEBOUNCE = 0.25
+    
     def __init__(self, callbacks):
         """
         Initialize icon manager
@@ -24,9 +34,39 @@ class IconManager:
         self.callbacks = callbacks
         self.icon = None
         self.recording = False
+        self.status_text = "Ready"
+        
+        # There are only two icon states; render each once and reuse them
+        self._img_idle = self.create_icon_image(False)
+        self._img_recording = self.create_icon_image(True)
+        
+        # Bursts of status changes are coalesced into one tray update
+        self._update_lock = threading.Lock()
+        self._update_timer = None
+        self._pending_state = None
+        
+        # Notifications are shown by one dedicated thread so callers never block on the shell.
+        # That thread is not the one running icon.run(): pystray has no public hook for
+        # scheduling work on the icon's thread (run(setup=...) also runs on its own thread).
+        self._notify_queue = queue.Queue()
+        self._notify_thread = None
+        
+        # Notifications queued before the icon is shown wait until it is visible
+        self._icon_visible = False
         
     def create_icon_image(self, recording=False):
-        """Create system tray icon image"""
+        """Load the system tray icon image, drawing it if the asset is missing"""
+        try:
+            image = Image.open(ICONS_DIR / ('recording.png' if recording else 'idle.png'))
+            image.load()  # Decode now rather than on first display
+            return image
+        except OSError:
+            return self.draw_icon_image(recording)
+    
+    def draw_icon_image(self, recording=False):
+        """Draw the system tray icon image"""
+        from PIL import ImageDraw  # only needed when the prebuilt PNGs are missing
+        
         # Create a 64x64 image
         image = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
         draw = ImageDraw.Draw(image)
@@ -47,8 +87,10 @@ class IconManager:
         
         return image
     
-    def create_menu(self, status_text="Ready"):
+    def create_menu(self):
         """Create the context menu for the tray icon"""
+        # Recording state and status text are read when the menu is shown, so one
+        # menu object serves every update
         return pystray.Menu(
             item('Meeting Recorder', lambda icon, item: None, enabled=False),
             pystray.Menu.SEPARATOR,
@@ -63,41 +105,99 @@ class IconManager:
             item('Test Audio Devices', self.callbacks['test_audio_devices']),
             item('Open Audio Folder', self.callbacks['open_audio_folder']),
             pystray.Menu.SEPARATOR,
-            item(f'Status: {status_text}', lambda icon, item: None, enabled=False),
+            item(lambda item: f'Status: {self.status_text}', lambda icon, item: None, enabled=False),
             pystray.Menu.SEPARATOR,
             item('Exit', self.callbacks['quit_application'])
         )
     
     def create_icon(self):
         """Create the system tray icon"""
-        image = self.create_icon_image(False)
+        image = self._img_idle
         menu = self.create_menu()
         self.icon = pystray.Icon("meeting_recorder", image, "Meeting Recorder", menu)
         return self.icon
     
     def update_icon_status(self, recording=False, status_text="Ready"):
-        """Update the icon and status"""
+        """
+        Update the icon and status
+        
+        The change is applied after UPDATE_DEBOUNCE seconds; later calls within
+        that window replace it, so only the final state reaches the tray.
+        """
+        with self._update_lock:
+            self._pending_state = (recording, status_text)
+            if self._update_timer is None:
+                self._update_timer = threading.Timer(self.UPDATE_DEBOUNCE, self._flush_update)
+                self._update_timer.daemon = True
+                self._update_timer.start()
+    
+    def _flush_update(self):
+        """Apply the most recent pending status (runs on the debounce timer)"""
+        with self._update_lock:
+            recording, status_text = self._pending_state
+            self._update_timer = None
+        
+        if recording == self.recording and status_text == self.status_text:
+            return  # Nothing visible changed
+        
+        image_changed = recording != self.recording
         self.recording = recording
+        self.status_text = status_text
         
         if self.icon:
-            # Update icon image
-            self.icon.icon = self.create_icon_image(recording)
+            if image_changed:
+                self.icon.icon = self._img_recording if recording else self._img_idle
             
-            # Update menu with new status
-            self.icon.menu = self.create_menu(status_text)
+            # Menu items read the new state when the menu is re-rendered
             self.icon.update_menu()
     
     def notify(self, title, message):
-        """Show a system notification"""
-        if self.icon:
-            self.icon.notify(title, message)
+        """Queue a system notification for the notifier thread; returns immediately"""
+        if not self.icon:
+            return
+        self._notify_queue.put((title, message))
+        with self._update_lock:
+            if self._icon_visible:
+                self._start_notifier()
+    
+    def _start_notifier(self):
+        """Start the notifier thread if it isn't running (caller holds _update_lock)"""
+        if self._notify_thread is None:
+            self._notify_thread = threading.Thread(target=self._notify_worker, daemon=True)
+            self._notify_thread.start()
+    
+    def _on_icon_ready(self, icon):
+        """Show the icon, then release the queued notifications (pystray setup callback)"""
+        icon.visible = True
+        with self._update_lock:
+            self._icon_visible = True
+            self._start_notifier()
+    
+    def _notify_worker(self):
+        """Show queued notifications one at a time (runs in background)"""
+        while True:
+            pending = self._notify_queue.get()
+            if pending is None:
+                return
+            try:
+                self.icon.notify(*pending)
+            except Exception as e:
+                print(f"⚠ Could not show notification: {e}")
     
     def stop(self):
         """Stop the tray icon"""
+        with self._update_lock:
+            if self._update_timer is not None:
+                self._update_timer.cancel()
+                self._update_timer = None
+            if self._notify_thread is not None:
+                self._notify_queue.put(None)
+                self._notify_thread = None
+        
         if self.icon:
             self.icon.stop()
     
     def run(self):
         """Run the tray icon (blocking)"""
         if self.icon:
-            self.icon.run()
+            self.icon.run(setup=self._on_icon_ready)
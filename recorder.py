@@ -1,10 +1,10 @@
-﻿import os
+﻿import shutil
 import subprocess
-import time
 from datetime import datetime
 from pathlib import Path
-import psutil
-import keyboard
+
+from file_manager import force_delete_file
+from hotkey_handler import HotkeyHandler
 
 class Recorder:
     def __init__(self, audio_folder, icon=None):
@@ -12,92 +12,44 @@ class Recorder:
         self.ffmpeg_process = None
         self.recording_file = None
         self.audio_folder = Path(audio_folder)
-        self.audio_folder.mkdir(parents=True, exist_ok=True)
+        if not self.audio_folder.is_dir():
+            self.audio_folder.mkdir(parents=True, exist_ok=True)
         self.icon = icon
+        self.ffmpeg_bin = shutil.which('ffmpeg') or 'ffmpeg'
 
     def force_delete_file(self, file_path):
-        if not os.path.exists(file_path):
-            print(f"✓ File doesn't exist: {file_path}")
-            return True
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                os.remove(file_path)
-                print(f"🗑️ Successfully deleted: {Path(file_path).name}")
-                return True
-            except PermissionError as e:
-                print(f"⚠ Attempt {attempt + 1}/{max_attempts}: File is locked - {e}")
-                if attempt < max_attempts - 1:
-                    try:
-                        killed_processes = []
-                        for proc in psutil.process_iter(['pid', 'name', 'open_files']):
-                            try:
-                                if proc.info['open_files']:
-                                    for file_info in proc.info['open_files']:
-                                        if file_info.path == str(file_path):
-                                            print(f"🔪 Killing process: {proc.info['name']} (PID: {proc.info['pid']})")
-                                            proc.kill()
-                                            killed_processes.append(proc.info['name'])
-                                            break
-                            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                                continue
-                        if killed_processes:
-                            print(f"✓ Killed processes: {', '.join(killed_processes)}")
-                            time.sleep(1)
-                        else:
-                            print("⚠ No processes found using the file")
-                    except Exception as kill_error:
-                        print(f"⚠ Error finding/killing processes: {kill_error}")
-                        time.sleep(2)
-                else:
-                    try:
-                        import subprocess
-                        result = subprocess.run(
-                            ['cmd', '/c', 'del', '/f', '/q', str(file_path)],
-                            capture_output=True,
-                            text=True,
-                            timeout=10
-                        )
-                        if result.returncode == 0:
-                            print(f"🗑️ Force deleted via CMD: {Path(file_path).name}")
-                            return True
-                        else:
-                            print(f"❌ CMD delete failed: {result.stderr}")
-                    except Exception as cmd_error:
-                        print(f"❌ CMD delete error: {cmd_error}")
-            except Exception as e:
-                print(f"❌ Attempt {attempt + 1}/{max_attempts}: Unexpected error - {e}")
-                if attempt < max_attempts - 1:
-                    time.sleep(1)
-        print(f"❌ Failed to delete file after {max_attempts} attempts: {file_path}")
-        return False
+        # Shared with FileManager; our own FFmpeg is checked first as the likely lock holder
+        return force_delete_file(file_path, self.ffmpeg_process)
 
     def generate_filename(self):
         now = datetime.now()
-        timestamp = now.strftime("%Y%m%d_%H%M%S")
-        filename = f"recording_{timestamp}.wav"
-        return self.audio_folder / filename
+        return self.audio_folder / (
+            f"recording_{now.year:04d}{now.month:02d}{now.day:02d}"
+            f"_{now.hour:02d}{now.minute:02d}{now.second:02d}.mp3"
+        )
 
     def start_recording(self):
         if self.recording:
             return
         self.recording_file = self.generate_filename()
         ffmpeg_cmd = [
-            'ffmpeg',
+            self.ffmpeg_bin,
             '-f', 'dshow',
             '-i', 'audio=Microphone (USB PnP Sound Device)',
             '-f', 'dshow',
             '-i', 'audio=CABLE Output (VB-Audio Virtual Cable)',
             '-filter_complex', 'amix=inputs=2:duration=longest',
+            '-c:a', 'libmp3lame',
+            '-b:a', '192k',
             '-y',
             str(self.recording_file)
         ]
         try:
             self.ffmpeg_process = subprocess.Popen(
                 ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+                stdin=subprocess.PIPE,  # Used to send 'q' for a graceful stop
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 creationflags=subprocess.CREATE_NO_WINDOW
             )
             self.recording = True
@@ -115,7 +67,13 @@ class Recorder:
         self.recording = False
         if self.ffmpeg_process:
             try:
-                self.ffmpeg_process.terminate()
+                # 'q' lets FFmpeg flush the encoder and close the file; terminate() can't
+                try:
+                    self.ffmpeg_process.stdin.write(b'q\n')
+                    self.ffmpeg_process.stdin.flush()
+                    self.ffmpeg_process.stdin.close()
+                except (OSError, ValueError):
+                    pass
                 try:
                     self.ffmpeg_process.wait(timeout=5)
                 except subprocess.TimeoutExpired:
@@ -126,13 +84,9 @@ class Recorder:
                 print(f"Error stopping FFmpeg: {e}")
 
     def setup_hotkey(self, callback):
-        try:
-            keyboard.add_hotkey('ctrl+shift+r', callback)
-            print("✓ Hotkey registered: Ctrl+Shift+R")
-            return True
-        except Exception as e:
-            print(f"⚠ Could not register hotkey: {e}")
-            return False
+        # RegisterHotKey on Windows instead of a hook that sees every key press
+        self.hotkey_handler = HotkeyHandler(callback)
+        return self.hotkey_handler.setup_hotkey('ctrl+shift+r')
 
     def toggle_recording(self):
         if self.recording:
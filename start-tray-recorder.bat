@@ -29,12 +29,6 @@ if errorlevel 1 (
     pip install pillow
 )
 
-python -c "import keyboard" 2>nul
-if errorlevel 1 (
-    echo Installing keyboard...
-    pip install keyboard
-)
-
 python -c "import requests" 2>nul
 if errorlevel 1 (
     echo Installing requests...
@@ -1,9 +1,26 @@
-﻿import pystray
+﻿import queue
+import threading
+from pathlib import Path
+
+import pystray
 from pystray import MenuItem as menuItem
-from PIL import Image, ImageDraw
+from PIL import Image
+
+ICONS_DIR = Path(__file__).parent / 'icons'
+
+
+def load_icon_image(recording=False):
+    # Same prebuilt PNGs as IconManager; decoding one beats issuing the draw calls
+    try:
+        image = Image.open(ICONS_DIR / ('recording.png' if recording else 'idle.png'))
+        image.load()
+        return image
+    except OSError:
+        return create_icon_image(recording)
 
 
 def create_icon_image(recording=False):
+    from PIL import ImageDraw  # fallback only; the PNGs normally make drawing unnecessary
     image = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(image)
     if recording:
@@ -18,7 +35,15 @@ def create_icon_image(recording=False):
     return image
 
 
+# Only two states exist, so render them once instead of on every status update
+_ICON_IDLE = load_icon_image(False)
+_ICON_REC = load_icon_image(True)
+
+
 class TrayIcon:
+    # Seconds to wait for further status changes before touching the tray
+    UPDATE_DEBOUNCE = 0.05
+
     def __init__(self, recorder, on_start, on_stop, on_test, on_open, on_send_audio, on_exit):
         self.recorder = recorder
         self.icon = None
@@ -28,10 +53,19 @@ class TrayIcon:
         self.on_open = on_open
         self.on_send_audio = on_send_audio
         self.on_exit = on_exit
+        self._shown_recording = False
+        # Bursts of status changes are coalesced into one tray update
+        self._update_lock = threading.Lock()
+        self._update_timer = None
+        self._pending_recording = False
+        # icon.notify can stall on the shell; callers only enqueue and one thread shows them.
+        # This keeps callers from blocking; it does not move the call onto the icon's thread.
+        self._notify_queue = queue.Queue()
+        self._notify_thread = None
         self.create_icon()
 
     def create_icon(self):
-        image = create_icon_image(False)
+        image = _ICON_IDLE
         menu = pystray.Menu(
             menuItem('Meeting Recorder', lambda icon, item: None, enabled=False),
             pystray.Menu.SEPARATOR,
@@ -48,17 +82,56 @@ class TrayIcon:
         self.icon = pystray.Icon("meeting_recorder", image, "Meeting Recorder", menu)
 
     def update_icon_status(self, recording=False):
+        # Applied after UPDATE_DEBOUNCE; later calls in that window just replace the state
+        with self._update_lock:
+            self._pending_recording = recording
+            if self._update_timer is None:
+                self._update_timer = threading.Timer(self.UPDATE_DEBOUNCE, self._flush_update)
+                self._update_timer.daemon = True
+                self._update_timer.start()
+
+    def _flush_update(self):
+        with self._update_lock:
+            recording = self._pending_recording
+            self._update_timer = None
+        # The menu is built once and its enabled-state lambdas only depend on recording,
+        # so a repeated status needs neither a new image nor a menu refresh
+        if recording == self._shown_recording:
+            return
+        self._shown_recording = recording
         if self.icon:
-            self.icon.icon = create_icon_image(recording)
+            self.icon.icon = _ICON_REC if recording else _ICON_IDLE
             self.icon.update_menu()
 
     def run(self):
         self.icon.run()
 
     def stop(self):
+        with self._update_lock:
+            if self._update_timer is not None:
+                self._update_timer.cancel()
+                self._update_timer = None
+            if self._notify_thread is not None:
+                self._notify_queue.put(None)
+                self._notify_thread = None
         self.icon.stop()
 
     def notify(self, title, message):
-        if self.icon:
-            self.icon.notify(title, message)
+        if not self.icon:
+            return
+        with self._update_lock:
+            if self._notify_thread is None:
+                self._notify_thread = threading.Thread(target=self._notify_worker, daemon=True)
+                self._notify_thread.start()
+        self._notify_queue.put((title, message))
+
+    def _notify_worker(self):
+        while True:
+            pending = self._notify_queue.get()
+            if pending is None:
+                return
+            try:
+                self.icon.notify(*pending)
+            except Exception as e:
+                print(f"⚠ Could not show notification: {e}")
 
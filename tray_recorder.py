@@ -6,41 +6,74 @@ System tray icon with Ctrl+Shift+R hotkey for quick recording control
 
 import sys
 import os
+import queue
 import threading
 import time
+from importlib.util import find_spec
 from pathlib import Path
 
+# Check for packages without importing them; the modules below load what they need
+_missing = [name for name in ('pystray', 'PIL', 'requests') if find_spec(name) is None]
+if _missing:
+    print(f"Missing required package: {', '.join(_missing)}")
+    print("Please install required packages:")
+    print("pip install pystray pillow requests")
+    sys.exit(1)
+
 # Import our custom modules
 from config_manager import ConfigManager
 from icon_manager import IconManager
 from audio_recorder import AudioRecorder
-from file_manager import FileManager
+from file_manager import FileManager, is_pending_reboot_delete
 from hotkey_handler import HotkeyHandler
 
-try:
-    import pystray
-    from pystray import MenuItem as item
-    from PIL import Image, ImageDraw
-    import keyboard
-    import requests
-except ImportError as e:
-    print(f"Missing required package: {e}")
-    print("Please install required packages:")
-    print("pip install pystray pillow keyboard requests")
-    sys.exit(1)
-
 class TrayRecorder:
+    # Seconds a folder listing is reused while the folder itself is unchanged;
+    # bounds staleness from files that grow without touching the directory (FFmpeg output)
+    DIR_CACHE_TTL = 5
+    
+    # Seconds quit waits for queued uploads/conversions before giving up on them
+    QUIT_JOB_TIMEOUT = 120
+    
     def __init__(self):
         # Initialize configuration manager
         self.config_manager = ConfigManager()
         
         # Initialize components
-        self.audio_recorder = AudioRecorder(self.config_manager.get_audio_folder())
+        self.audio_recorder = AudioRecorder(
+            self.config_manager.get_audio_folder(),
+            *self.config_manager.get_audio_devices(),
+            remove_silence=self.config_manager.get_remove_silence()
+        )
         self.file_manager = FileManager(
             self.config_manager.get_webhook_url(),
-            self.config_manager.get_credentials()
+            self.config_manager.get_credentials(),
+            gzip_wav=self.config_manager.get_gzip_wav_uploads(),
+            upload_concurrency=self.config_manager.get_upload_concurrency()
         )
         
+        # Set once FFmpeg has exited and the recording file is finalized
+        self._recording_stopped = threading.Event()
+        self._recording_stopped.set()
+        
+        # Set from a successful start until stop is requested. Unlike AudioRecorder.recording
+        # it clears immediately, so a second toggle while FFmpeg shuts down is a no-op; the
+        # lock makes check-and-act atomic between the hotkey and menu threads
+        self._recording = threading.Event()
+        self._state_lock = threading.Lock()
+        
+        # Set once quit was requested; no new recording may start after that
+        self._quitting = threading.Event()
+        
+        # Uploads, conversions and batch sends run one at a time on a single long-lived
+        # worker; entries are (function, args), None stops it
+        self._file_jobs = queue.Queue()
+        self._file_worker = threading.Thread(target=self._file_job_worker, daemon=True)
+        self._file_worker.start()
+        
+        # suffix -> (folder mtime_ns, expiry, paths) for _list_audio_folder
+        self._dir_cache = {}
+        
         # Setup callbacks for icon manager
         callbacks = {
             'start_recording': self.start_recording,
@@ -53,7 +86,7 @@ class TrayRecorder:
         }
         
         self.icon_manager = IconManager(callbacks)
-        self.hotkey_handler = HotkeyHandler(self.toggle_recording)
+        self.hotkey_handler = HotkeyHandler(self.toggle_recording, on_error=self.icon_manager.notify)
         
         # Create tray icon
         self.icon = self.icon_manager.create_icon()
@@ -62,14 +95,22 @@ class TrayRecorder:
     
     def toggle_recording(self):
         """Toggle recording on/off"""
-        if self.audio_recorder.is_recording():
+        if self._recording.is_set():
             self.stop_recording()
         else:
             self.start_recording()
     
     def start_recording(self):
         """Start FFmpeg recording"""
-        success, message = self.audio_recorder.start_recording()
+        with self._state_lock:
+            if self._recording.is_set() or self._quitting.is_set():
+                return
+            if not self._recording_stopped.is_set():
+                success, message = False, "Previous recording is still being saved"
+            else:
+                success, message = self.audio_recorder.start_recording()
+                if success:
+                    self._recording.set()
         
         if success:
             self.icon_manager.update_icon_status(True, "Recording...")
@@ -79,36 +120,60 @@ class TrayRecorder:
     
     def stop_recording(self):
         """Stop FFmpeg recording and upload"""
-        if not self.audio_recorder.is_recording():
-            return
+        with self._state_lock:
+            if not self._recording.is_set():
+                return
+            self._recording.clear()
+            self._recording_stopped.clear()
         
         self.icon_manager.update_icon_status(False, "Stopping...")
         
-        success, message = self.audio_recorder.stop_recording()
-        
-        if success:
-            # Get the recording file path
-            recording_file = self.audio_recorder.get_current_recording_file()
+        # Waiting for FFmpeg to exit can take seconds; keep it off the hotkey/menu thread
+        threading.Thread(target=self._finish_recording, daemon=True).start()
+    
+    def _finish_recording(self):
+        """Wait for FFmpeg to stop, then upload the recording (runs in background)"""
+        try:
+            success, message = self.audio_recorder.stop_recording()
             
-            if recording_file and os.path.exists(recording_file):
-                file_size = os.path.getsize(recording_file)
-                if file_size > 1024:  # Only upload if file has content
-                    self.icon_manager.update_icon_status(False, "Uploading...")
-                    threading.Thread(target=self.upload_file, args=(recording_file,), daemon=True).start()
-                else:
-                    print("⚠ Recording file too small, not uploading")
-                    self.icon_manager.update_icon_status(False, "Ready")
+            if success:
+                # stop_recording already stat'ed the file and rejected missing or tiny recordings
+                recording_file = self.audio_recorder.get_current_recording_file()
+                # Hand over the FFmpeg process too, in case it still holds the file at delete time
+                writer_proc = self.audio_recorder.ffmpeg_process
+                self.icon_manager.update_icon_status(False, "Uploading...")
+                self._file_jobs.put((self.upload_file, (recording_file, writer_proc)))
             else:
+                self.icon_manager.notify("Stop Recording Failed", message)
                 self.icon_manager.update_icon_status(False, "Ready")
-        else:
-            self.icon_manager.notify("Stop Recording Failed", message)
-            self.icon_manager.update_icon_status(False, "Ready")
+        finally:
+            # Only now may a new recording replace the file/process fields, and quit's
+            # sentinel can only be queued behind the upload job
+            self._recording_stopped.set()
+    
+    def _file_job_worker(self):
+        """Drain the file job queue (runs in background until quit)"""
+        while True:
+            job = self._file_jobs.get()
+            if job is None:
+                self._file_jobs.task_done()
+                return
+            func, args = job
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"❌ Background job failed: {e}")
+            finally:
+                # Files were converted, uploaded or deleted
+                self._dir_cache.clear()
+                self._file_jobs.task_done()
     
-    def upload_file(self, file_path):
+    def upload_file(self, file_path, writer_proc=None):
         """Convert to MP3 if needed, upload to webhook, and clean up"""
         try:
             source_path = Path(file_path)
             target_path = source_path
+            target_proc = writer_proc
 
             # If WAV, convert to MP3 first
             if source_path.suffix.lower() == '.wav':
@@ -116,10 +181,11 @@ class TrayRecorder:
                 converted, mp3_path, conv_msg = self.file_manager.convert_wav_to_mp3(str(source_path))
                 if converted and mp3_path:
                     target_path = Path(mp3_path)
+                    target_proc = None  # The converter has already exited
                     self.icon_manager.notify("Conversion Complete", conv_msg)
                     # Always delete the original WAV after successful conversion
                     try:
-                        self.file_manager.force_delete_file(str(source_path))
+                        self.file_manager.force_delete_file(str(source_path), writer_proc)
                     except Exception:
                         pass
                 else:
@@ -128,7 +194,7 @@ class TrayRecorder:
 
             # Upload target file (MP3 if converted, else original)
             self.icon_manager.update_icon_status(False, "Uploading...")
-            success, message = self.file_manager.upload_and_delete_file(str(target_path))
+            success, message = self.file_manager.upload_and_delete_file(str(target_path), target_proc)
 
             if success:
                 self.icon_manager.notify("Upload Complete", message)
@@ -139,15 +205,64 @@ class TrayRecorder:
         finally:
             self.icon_manager.update_icon_status(False, "Ready")
 
+    def _list_audio_folder(self, suffix):
+        """
+        List files with the given suffix in the audio folder, oldest first
+        
+        Uses a single os.scandir pass; DirEntry caches the stat data on Windows
+        so sorting by modification time costs no extra syscalls. The result is
+        reused for DIR_CACHE_TTL seconds as long as the folder's mtime is unchanged.
+        Files already uploaded but only deletable at reboot are left out.
+        
+        Args:
+            suffix: Lowercase file extension including the dot (e.g. '.mp3')
+            
+        Returns:
+            list: Path objects sorted by modification time
+        """
+        folder = self.audio_recorder.get_audio_folder()
+        folder_mtime = os.stat(folder).st_mtime_ns
+        cached = self._dir_cache.get(suffix)
+        if cached and cached[0] == folder_mtime and time.monotonic() < cached[1]:
+            return [p for p in cached[2] if not is_pending_reboot_delete(p)]
+        
+        with os.scandir(folder) as it:
+            entries = [(e.stat().st_mtime, e.path) for e in it
+                       if e.name.lower().endswith(suffix) and e.is_file()]
+        entries.sort()
+        paths = [Path(path) for _, path in entries]
+        self._dir_cache[suffix] = (folder_mtime, time.monotonic() + self.DIR_CACHE_TTL, paths)
+        return [p for p in paths if not is_pending_reboot_delete(p)]
+
+    def _latest_in_audio_folder(self, suffix):
+        """
+        Find the most recently modified file with the given suffix in the audio folder
+        
+        Args:
+            suffix: Lowercase file extension including the dot (e.g. '.wav')
+            
+        Returns:
+            Path: The newest matching file, or None if there is none
+        """
+        latest_mtime, latest_path = None, None
+        with os.scandir(self.audio_recorder.get_audio_folder()) as it:
+            for e in it:
+                if e.name.lower().endswith(suffix) and e.is_file() and not is_pending_reboot_delete(e.path):
+                    mtime = e.stat().st_mtime
+                    if latest_mtime is None or mtime > latest_mtime:
+                        latest_mtime, latest_path = mtime, e.path
+        return Path(latest_path) if latest_path else None
+
     def convert_latest_to_mp3(self):
-        """Convert the most recent WAV in the audio folder to MP3"""
+        """Convert the most recent WAV in the audio folder to MP3 (runs in background)"""
+        self._file_jobs.put((self._convert_latest_to_mp3_worker, ()))
+
+    def _convert_latest_to_mp3_worker(self):
         try:
-            folder = self.audio_recorder.get_audio_folder()
-            wav_files = list(Path(folder).glob('*.wav'))
-            if not wav_files:
+            latest_wav = self._latest_in_audio_folder('.wav')
+            if not latest_wav:
                 self.icon_manager.notify("Convert to MP3", "No WAV files found")
                 return
-            latest_wav = max(wav_files, key=lambda p: p.stat().st_mtime)
             self.icon_manager.update_icon_status(False, "Converting to MP3...")
             success, mp3_path, message = self.file_manager.convert_wav_to_mp3(str(latest_wav))
             if success:
@@ -173,18 +288,28 @@ class TrayRecorder:
 
     def send_mp3_files(self):
         """Send all MP3 files in the audio folder to n8n (runs in background)"""
-        threading.Thread(target=self._send_mp3_files_worker, daemon=True).start()
+        self._file_jobs.put((self._send_mp3_files_worker, ()))
 
     def _send_mp3_files_worker(self):
         try:
-            folder = self.audio_recorder.get_audio_folder()
-            mp3_files = sorted(list(Path(folder).glob('*.mp3')), key=lambda p: p.stat().st_mtime)
+            mp3_files = self._list_audio_folder('.mp3')
+            # Recordings are written straight to .mp3; leave the one FFmpeg still owns
+            # alone, its own upload job sends it once it is finalized
+            if self.audio_recorder.is_recording() or not self._recording_stopped.is_set():
+                current = self.audio_recorder.get_current_recording_file()
+                mp3_files = [p for p in mp3_files if p != current]
             if not mp3_files:
                 self.icon_manager.notify("Send MP3 Files", "No MP3 files found")
                 return
             self.icon_manager.update_icon_status(False, "Uploading MP3 files...")
-            for mp3_file in mp3_files:
-                success, message = self.file_manager.upload_and_delete_file(str(mp3_file))
+            if self.config_manager.get_batch_upload():
+                # Several files per request; needs a batch-aware n8n workflow
+                results = self.file_manager.upload_batches(mp3_files)
+            else:
+                # Uploads run concurrently; notify as each one finishes
+                workers = self.config_manager.get_upload_concurrency()
+                results = self.file_manager.upload_many(mp3_files, workers)
+            for mp3_file, success, message in results:
                 if success:
                     self.icon_manager.notify("Upload Complete", f"{mp3_file.name}")
                 else:
@@ -195,23 +320,67 @@ class TrayRecorder:
             self.icon_manager.update_icon_status(False, "Ready")
     
     def test_audio_devices(self):
-        """Audio device tester (feature removed for simplicity)"""
-        self.icon_manager.notify("Audio Test", "Device testing feature was removed for simplicity")
+        """Show the available audio capture devices (runs in background)"""
+        threading.Thread(target=self._test_audio_devices_worker, daemon=True).start()
+
+    def _test_audio_devices_worker(self):
+        try:
+            devices = self.audio_recorder.list_audio_devices()
+            if devices:
+                self.icon_manager.notify("Audio Devices", "\n".join(devices))
+            else:
+                self.icon_manager.notify("Audio Devices", "No audio devices found")
+        except Exception as e:
+            self.icon_manager.notify("Audio Test Error", str(e))
     
     def open_audio_folder(self):
         """Open the audio output folder"""
         self.file_manager.open_folder(self.audio_recorder.get_audio_folder())
     
     def quit_application(self):
-        """Quit the application"""
-        if self.audio_recorder.is_recording():
+        """Quit the application (shutdown runs in background)"""
+        with self._state_lock:
+            if self._quitting.is_set():
+                return
+            self._quitting.set()
+        
+        if self._recording.is_set():
             self.stop_recording()
-            # Give it a moment to stop
-            time.sleep(2)
+        
+        self.icon_manager.update_icon_status(False, "Exiting...")
+        
+        # Waiting for FFmpeg and pending uploads can take minutes; keep it off the menu
+        # thread so the tray stays responsive. Not a daemon: the process must not exit
+        # before the uploads are done and the session is closed.
+        threading.Thread(target=self._shutdown).start()
+    
+    def _shutdown(self):
+        """Wait for the recording and queued jobs, then release everything (runs in background)"""
+        # The sentinel must queue behind the last recording's upload job, which
+        # _finish_recording adds just before setting _recording_stopped
+        if not self._recording_stopped.wait(timeout=15):
+            print("⏳ Waiting for the recording to be saved before exiting...")
+            self.icon_manager.notify("Exiting", "Saving the recording...")
+            self._recording_stopped.wait()
+        
+        # Let the file worker exit once the jobs already queued are done, and wait for it:
+        # closing the session under an in-flight upload would abort it
+        self._file_jobs.put(None)
+        self._file_worker.join(timeout=1)
+        if self._file_worker.is_alive():
+            print("⏳ Waiting for pending uploads before exiting...")
+            self.icon_manager.notify("Exiting", "Finishing pending uploads...")
+            self._file_worker.join(timeout=self.QUIT_JOB_TIMEOUT)
+            if self._file_worker.is_alive():
+                print("⚠ Pending uploads did not finish; unsent files stay in the audio folder")
+                self.icon_manager.notify("Exiting", "Some uploads did not finish; the files stay in the audio folder")
         
         # Clean up hotkeys
         self.hotkey_handler.cleanup()
         
+        # Release pooled upload connections
+        self.file_manager.close()
+        
         # Stop the icon
         self.icon_manager.stop()
     
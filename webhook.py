@@ -1,19 +1,79 @@
 ﻿import json
+import socket
+from contextlib import ExitStack
 from pathlib import Path
 from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 import os
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+# MIME types for the audio formats the uploaders send
+AUDIO_MIME_TYPES = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.m4a': 'audio/mp4',
+    '.aac': 'audio/aac',
+    '.flac': 'audio/flac',
+    '.ogg': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.wma': 'audio/x-ms-wma',
+}
+
+# (connect, read) timeouts: give up quickly on a dead endpoint, stay patient between bytes
+UPLOAD_TIMEOUT = (5, 60)
+
+# Bytes pulled from the multipart encoder per socket write (urllib3 defaults to 16 KiB)
+UPLOAD_BLOCKSIZE = 1024 * 1024
+
+class UploadAdapter(HTTPAdapter):
+    # urllib3's defaults already set TCP_NODELAY; add SO_KEEPALIVE so the OS notices
+    # pooled connections the server silently dropped
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.SOCKET_OPTIONS
+        kwargs.setdefault('blocksize', UPLOAD_BLOCKSIZE)
+        super().init_poolmanager(*args, **kwargs)
+
 class WebhookUploader:
-    def __init__(self, webhook_url, credentials, icon=None):
+    def __init__(self, webhook_url, credentials, icon=None, session=None):
         self.webhook_url = webhook_url
         self.credentials = credentials
         self.icon = icon
+        # A shared session keeps the connection alive between uploads
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            # urllib3 doesn't retry POST on a status code, so this only covers failed connects
+            adapter = UploadAdapter(max_retries=Retry(total=3, backoff_factor=0.5))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def close(self):
+        # A session passed in belongs to the caller, who closes it
+        if self._owns_session:
+            self.session.close()
 
     def upload_file(self, recording_file, force_delete_callback=None):
+        # recording_file may be a str or any os.PathLike; open() and Path() accept both.
+        # Returns True if the webhook accepted the file, like upload_files.
         try:
             file_info = Path(recording_file)
-            file_size = file_info.stat().st_size
+            st = file_info.stat()
+            file_size = st.st_size
             print(f"📤 Uploading: {file_info.name} ({file_size / (1024 * 1024):.2f} MB)")
             metadata = {
                 "event": "tray_recording",
@@ -23,24 +83,27 @@ class WebhookUploader:
                     "path": str(recording_file),
                     "size_bytes": file_size,
                     "size_mb": round(file_size / (1024 * 1024), 2),
-                    "created": datetime.fromtimestamp(file_info.stat().st_ctime).isoformat(),
-                    "modified": datetime.fromtimestamp(file_info.stat().st_mtime).isoformat()
+                    "created": datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
                 },
                 "source": "tray_recorder"
             }
             username = self.credentials.get("username", "")
             password = self.credentials.get("password", "")
+            mime_type = AUDIO_MIME_TYPES.get(file_info.suffix.lower(), 'application/octet-stream')
             with open(recording_file, 'rb') as f:
-                files = {
-                    'data': (file_info.name, f, 'audio/wav'),
-                    'metadata': (None, json.dumps(metadata), 'application/json')
-                }
+                # Stream the multipart body from disk instead of building it in memory
+                encoder = MultipartEncoder(fields={
+                    'data': (file_info.name, f, mime_type),
+                    'metadata': (None, _dumps(metadata), 'application/json')
+                })
                 auth = (username, password) if username and password else None
-                response = requests.post(
+                response = self.session.post(
                     self.webhook_url,
-                    files=files,
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type},
                     auth=auth,
-                    timeout=60
+                    timeout=UPLOAD_TIMEOUT
                 )
             if response.status_code == 200:
                 print("✅ Upload successful")
@@ -52,12 +115,68 @@ class WebhookUploader:
                         print(f"⚠ Could not delete file: {recording_file}")
                         if self.icon:
                             self.icon.notify("Upload Complete", f"File uploaded but not deleted: {file_info.name}")
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                if self.icon:
-                    self.icon.notify("Upload Failed", f"Status: {response.status_code}")
+                return True
+            print(f"❌ Upload failed: {response.status_code}")
+            if self.icon:
+                self.icon.notify("Upload Failed", f"Status: {response.status_code}")
+            return False
         except Exception as e:
             print(f"❌ Upload error: {e}")
             if self.icon:
                 self.icon.notify("Upload Error", str(e))
+            return False
+
 
+    def upload_files(self, recording_files):
+        # Send several recordings in one multipart request as data0, data1, ...
+        # Needs an n8n workflow that reads the "files" list from the batch metadata.
+        try:
+            file_infos = [Path(p) for p in recording_files]
+            files_meta = []
+            for file_info in file_infos:
+                st = file_info.stat()
+                files_meta.append({
+                    "name": file_info.name,
+                    "path": str(file_info),
+                    "size_bytes": st.st_size,
+                    "size_mb": round(st.st_size / (1024 * 1024), 2),
+                    "created": datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
+                })
+            total_mb = sum(m["size_bytes"] for m in files_meta) / (1024 * 1024)
+            print(f"📤 Uploading batch of {len(file_infos)} files ({total_mb:.2f} MB)")
+            metadata = {
+                "event": "tray_recording_batch",
+                "timestamp": datetime.now().isoformat(),
+                "files": files_meta,
+                "source": "tray_recorder"
+            }
+            username = self.credentials.get("username", "")
+            password = self.credentials.get("password", "")
+            with ExitStack() as stack:
+                fields = [
+                    (f'data{i}', (
+                        file_info.name,
+                        stack.enter_context(open(file_info, 'rb')),
+                        AUDIO_MIME_TYPES.get(file_info.suffix.lower(), 'application/octet-stream')
+                    ))
+                    for i, file_info in enumerate(file_infos)
+                ]
+                fields.append(('metadata', (None, _dumps(metadata), 'application/json')))
+                encoder = MultipartEncoder(fields=fields)
+                auth = (username, password) if username and password else None
+                response = self.session.post(
+                    self.webhook_url,
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type},
+                    auth=auth,
+                    timeout=UPLOAD_TIMEOUT
+                )
+            if response.status_code == 200:
+                print("✅ Batch upload successful")
+                return True
+            print(f"❌ Batch upload failed: {response.status_code}")
+            return False
+        except Exception as e:
+            print(f"❌ Batch upload error: {e}")
+            return False